@@ -0,0 +1,71 @@
+"""Cache of rendered HTMX fragments, keyed on a hash of their data.
+
+The key is the template name and a sha256 of the template source, the context
+and ``vary`` (anything else the template depends on, e.g. today's date). New
+repository data or a changed template gives a new key, so a fragment never
+needs to be invalidated; old ones expire after ``FRAGMENT_TTL``. Fragments are
+stored in the shared repository cache next to the data they are rendered from.
+"""
+
+import hashlib
+import logging
+from collections.abc import Hashable
+from typing import Any
+
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from django.template.loader import get_template, render_to_string
+
+from family_intranet.otel import METRIC_PREFIX, get_meter
+from family_intranet.repositories.cache import CACHE_ALIAS
+
+logger = logging.getLogger(__name__)
+
+FRAGMENT_TTL = 86_400
+
+_meter = get_meter("fragment_cache")
+_fragment_requests = _meter.create_counter(
+    f"{METRIC_PREFIX}.fragment_cache.requests",
+    description="Rendered fragment lookups, by template and hit or miss",
+)
+
+
+def fragment_key(
+    template_name: str, context: dict[str, Any], *, vary: tuple[Hashable, ...] = ()
+) -> str:
+    """Key of a fragment: its template name and a hash of source, data and vary."""
+    source = get_template(template_name).template.source
+    digest = hashlib.sha256(source.encode())
+    digest.update(repr((sorted(context.items()), vary)).encode())
+    return f"fragment:{template_name}:{digest.hexdigest()[:32]}"
+
+
+def render_cached(
+    request: HttpRequest,
+    template_name: str,
+    context: dict[str, Any],
+    *,
+    vary: tuple[Hashable, ...] = (),
+) -> HttpResponse:
+    """Render ``template_name`` like ``render``, reusing an identical fragment.
+
+    The context must hold the data only (its ``repr`` is hashed); templates
+    that use the request, e.g. for ``csrf_token``, must not be cached.
+    """
+    cache = caches[CACHE_ALIAS]
+    key = fragment_key(template_name, context, vary=vary)
+    try:
+        html = cache.get(key)
+    except Exception:
+        logger.warning("Fragment cache read failed for %s.", key, exc_info=True)
+        html = None
+    _fragment_requests.add(
+        1, {"template": template_name, "result": "miss" if html is None else "hit"}
+    )
+    if html is None:
+        html = render_to_string(template_name, context, request)
+        try:
+            cache.set(key, html, timeout=FRAGMENT_TTL)
+        except Exception:
+            logger.warning("Fragment cache write failed for %s.", key, exc_info=True)
+    return HttpResponse(html)
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from family_intranet.jobs.garmin.runner import run_garmin_backfill
+
+
+class Command(BaseCommand):
+    help = "Enqueue one Garmin backfill task per day or week of a date range"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--from", dest="start_date", type=date.fromisoformat, required=True
+        )
+        parser.add_argument(
+            "--to",
+            dest="end_date",
+            type=date.fromisoformat,
+            default=timezone.localdate(),
+        )
+        parser.add_argument("--chunk", choices=("day", "week"), default="day")
+
+    def handle(self, *_args: object, **options: Any) -> None:
+        start_date: date = options["start_date"]
+        end_date: date = options["end_date"]
+        step = timedelta(days=7 if options["chunk"] == "week" else 1)
+
+        enqueued = 0
+        chunk_start = start_date
+        while chunk_start <= end_date:
+            chunk_end = min(chunk_start + step - timedelta(days=1), end_date)
+            result = run_garmin_backfill.enqueue(
+                chunk_start.isoformat(), chunk_end.isoformat()
+            )
+            self.stdout.write(
+                f"Enqueued Garmin backfill {chunk_start} to {chunk_end}: {result.id}"
+            )
+            chunk_start = chunk_end + timedelta(days=1)
+            enqueued += 1
+        self.stdout.write(f"Enqueued {enqueued} Garmin backfill tasks.")
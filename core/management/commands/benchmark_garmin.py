@@ -0,0 +1,111 @@
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from sqlalchemy import URL, create_engine, make_url
+
+from family_intranet.jobs.garmin import db, partitions, schema
+from family_intranet.jobs.garmin.archive import GarminArchive
+from family_intranet.jobs.garmin.benchmark import (
+    benchmark_heart_rate_memory,
+    benchmark_loaders,
+    benchmark_timestamp_conversion,
+)
+
+
+class Command(BaseCommand):
+    help = "Run the offline Garmin ingest benchmarks"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--points", type=int, default=14 * 720)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--loaders",
+            action="store_true",
+            help="Replay archived days through every loader into PostgreSQL",
+        )
+        parser.add_argument("--archive", type=Path, default=None)
+        parser.add_argument("--days", type=int, default=7)
+        parser.add_argument(
+            "--database-url",
+            default=None,
+            help="Local stand-in database to write to (required with --loaders)",
+        )
+        parser.add_argument(
+            "--prepare-schema",
+            action="store_true",
+            help="Create the Garmin schema and partitions in the stand-in first",
+        )
+        parser.add_argument("--bulk-load", choices=("copy", "insert"), default=None)
+        parser.add_argument("--chunk-size", type=int, default=db.UPSERT_CHUNK_SIZE)
+
+    def handle(self, *_args: object, **options: Any) -> None:
+        if options["loaders"]:
+            self._benchmark_loaders(options)
+            return
+
+        results = benchmark_timestamp_conversion(
+            points=options["points"], repeat=options["repeat"]
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.name:<24} {result.seconds * 1000:>9.2f} ms "
+                f"{result.points_per_second:>12,.0f} points/s"
+            )
+        for result in benchmark_heart_rate_memory(points=options["points"]):
+            self.stdout.write(
+                f"{result.name:<24} {result.peak_bytes / 1024:>9.0f} KiB "
+                f"{result.bytes_per_point:>12,.0f} bytes/point"
+            )
+
+    def _benchmark_loaders(self, options: dict[str, Any]) -> None:
+        if options["archive"] is not None:
+            archive = GarminArchive(options["archive"].expanduser())
+        elif (archive := GarminArchive.from_settings()) is None:
+            msg = "No Garmin archive (pass --archive or set GARMIN_ARCHIVE_PATH)."
+            raise CommandError(msg)
+        dates = archive.dates()[-options["days"] :]
+        if not dates:
+            msg = f"No archived Garmin days in {archive.root}."
+            raise CommandError(msg)
+
+        if not options["database_url"]:
+            msg = "Pass --database-url of a local stand-in for the Garmin datastore."
+            raise CommandError(msg)
+        url = make_url(options["database_url"])
+        if _is_garmin_datastore(url):
+            msg = "Refusing to benchmark against the Garmin datastore."
+            raise CommandError(msg)
+
+        engine = create_engine(url)
+        if options["prepare_schema"]:
+            schema.ensure_schema(engine)
+            partitions.ensure_partitions(engine, dates[0], dates[-1])
+
+        self.stdout.write(
+            f"{len(dates)} archived days from {dates[0]} to {dates[-1]}, "
+            f"bulk load {options['bulk_load'] or 'per table'}"
+        )
+        for result in benchmark_loaders(
+            engine,
+            archive,
+            dates,
+            bulk_load=options["bulk_load"],
+            chunk_size=options["chunk_size"],
+        ):
+            self.stdout.write(
+                f"{result.loader:<14} {result.rows:>9,} rows "
+                f"{result.seconds * 1000:>9.1f} ms "
+                f"{result.rows_per_second:>10,.0f} rows/s "
+                f"{result.statements_per_day:>6.1f} statements/day "
+                f"{result.peak_bytes / 1024:>8.0f} KiB peak"
+            )
+
+
+def _is_garmin_datastore(url: URL) -> bool:
+    return (
+        (url.host or "localhost") == (settings.GARMIN_DB_HOST or "localhost")
+        and (url.port or 5432) == settings.GARMIN_DB_PORT
+        and url.database == settings.GARMIN_DB_NAME
+    )
@@ -0,0 +1,25 @@
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from family_intranet.jobs.garmin.runner import replay_archive
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Garmin tables from the raw-payload archive, without network"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--from", dest="start_date", type=date.fromisoformat, default=date.min
+        )
+        parser.add_argument(
+            "--to", dest="end_date", type=date.fromisoformat, default=date.max
+        )
+        parser.add_argument("--workers", type=int, default=4)
+
+    def handle(self, *_args: object, **options: Any) -> None:
+        replayed = replay_archive(
+            options["start_date"], options["end_date"], workers=options["workers"]
+        )
+        self.stdout.write(f"Replayed {replayed} archived Garmin days.")
@@ -5,6 +5,7 @@ from django_apscheduler.jobstores import DjangoJobStore
 
 from family_intranet.jobs.garmin.runner import run_garmin_load
 from family_intranet.jobs.heartbeat import worker_heartbeat
+from family_intranet.jobs.refresh import REFRESHES, refresh_repository_cache
 
 _scheduler: BackgroundScheduler | None = None
 
@@ -17,6 +18,10 @@ def _enqueue_heartbeat() -> None:
     worker_heartbeat.enqueue()
 
 
+def _enqueue_refresh(name: str) -> None:
+    refresh_repository_cache.enqueue(name)
+
+
 def start() -> None:
     global _scheduler  # noqa: PLW0603
     if _scheduler is not None:
@@ -38,4 +43,13 @@ def start() -> None:
         id="worker_heartbeat",
         replace_existing=True,
     )
+    for name, refresh in REFRESHES.items():
+        _scheduler.add_job(
+            _enqueue_refresh,
+            "interval",
+            minutes=refresh.interval_minutes,
+            args=[name],
+            id=f"refresh_{name}",
+            replace_existing=True,
+        )
     _scheduler.start()
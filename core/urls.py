@@ -15,6 +15,8 @@ urlpatterns = [
         "vertretungsplan/data/", views.vertretungsplan_data, name="vertretungsplan_data"
     ),
     path("weather/", views.weather, name="weather"),
+    path("garmin/", views.garmin, name="garmin"),
+    path("garmin/data/", views.garmin_data, name="garmin_data"),
     path("pihole/status/", views.pihole_status, name="pihole_status"),
     path("pihole/disable/", views.pihole_disable, name="pihole_disable"),
     path("pushover/send/", views.pushover_send, name="pushover_send"),
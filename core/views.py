@@ -1,14 +1,17 @@
 import logging
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 
 import pytz
 from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils import timezone
 from django.views.decorators.http import require_POST
 from gcsa.event import Event
+from sqlalchemy.exc import OperationalError
 
+from core.fragment_cache import render_cached
 from family_intranet.otel import METRIC_PREFIX, get_meter, timed_repository_call
 from family_intranet.repositories.fussballde import (
     get_e2_junioren_home_url,
@@ -16,6 +19,12 @@ from family_intranet.repositories.fussballde import (
     get_speldorf_next_home_games,
     get_vfb_speldorf_home_url,
 )
+from family_intranet.repositories.garmin import (
+    DEFAULT_POINT_BUDGET,
+    GARMIN_SERIES,
+    MAX_DAYS,
+    get_garmin_series,
+)
 from family_intranet.repositories.google_calendar import (
     create_appointment,
     delete_appointment,
@@ -84,7 +93,7 @@ def handball_games_data(request):
             "erste_herren_url": erste_herren_url,
             "erste_herren_gruppe_url": erste_herren_gruppe_url,
         }
-        return render(request, "core/handball_games_content.html", context)
+        return render_cached(request, "core/handball_games_content.html", context)
     except (ConnectionError, TimeoutError, ValueError) as e:
         context = {"error": str(e)}
         return render(request, "core/handball_games_content.html", context)
@@ -110,7 +119,7 @@ def football_games_data(request):
             "e2_junioren_url": e2_junioren_url,
             "vfb_speldorf_url": vfb_speldorf_url,
         }
-        return render(request, "core/football_games_content.html", context)
+        return render_cached(request, "core/football_games_content.html", context)
     except (ConnectionError, TimeoutError, ValueError) as e:
         context = {"error": str(e)}
         return render(request, "core/football_games_content.html", context)
@@ -128,7 +137,11 @@ def muelltermine_data(request):
             termine = get_muelltermine_for_home()
             wertstoffhof = get_wertstoffhof_oeffnungszeiten()
         context = {"termine": termine, "wertstoffhof": wertstoffhof}
-        return render(request, "core/muelltermine_content.html", context)
+        # The badges depend on the day (Termin.delta_days), not only on the data.
+        today = date.today()  # noqa: DTZ011
+        return render_cached(
+            request, "core/muelltermine_content.html", context, vary=(today,)
+        )
     except (ConnectionError, TimeoutError, ValueError) as e:
         context = {"error": str(e)}
         return render(request, "core/muelltermine_content.html", context)
@@ -246,6 +259,57 @@ def weather(request):
         return render(request, "core/weather.html", context)
 
 
+def garmin(request):
+    context = {"series": {name: spec.label for name, spec in GARMIN_SERIES.items()}}
+    return render(request, "core/garmin.html", context)
+
+
+def garmin_data(request):
+    """Garmin series as JSON, downsampled on the server for Highcharts.
+
+    Query parameters: ``days`` (range length 1-365, default 7) ending with ``end``
+    (ISO date, default today), ``series`` (comma-separated names, default all)
+    and ``points`` (point budget per series).
+    """
+    logger = logging.getLogger(__name__)
+
+    try:
+        days = int(request.GET.get("days", 7))
+        if not 1 <= days <= MAX_DAYS:
+            return JsonResponse(
+                {"success": False, "error": f"days must be between 1 and {MAX_DAYS}"},
+                status=400,
+            )
+        end_date_str = request.GET.get("end")
+        end_date = (
+            date.fromisoformat(end_date_str) if end_date_str else timezone.localdate()
+        )
+        names = request.GET.get("series", ",".join(GARMIN_SERIES)).split(",")
+        point_budget = int(request.GET.get("points", DEFAULT_POINT_BUDGET))
+
+        berlin_tz = pytz.timezone("Europe/Berlin")
+        end = berlin_tz.localize(
+            datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        )
+        start = berlin_tz.localize(
+            datetime.combine(end_date - timedelta(days=days - 1), datetime.min.time())
+        )
+        with timed_repository_call("garmin"):
+            series = get_garmin_series(names, start, end, point_budget=point_budget)
+
+        return JsonResponse(
+            {"success": True, "series": [s.model_dump() for s in series]}
+        )
+    except ValueError as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+    except OperationalError as e:
+        logger.error(f"Garmin data error: {e}", exc_info=True)
+        return JsonResponse(
+            {"success": False, "error": "Garmin-Datenbank nicht erreichbar"},
+            status=500,
+        )
+
+
 def calendar(request):
     # Initial page load - just show loading placeholder
     return render(request, "core/calendar.html")
@@ -680,17 +744,25 @@ def tasks_enqueue(request, job_id: str):  # noqa: ARG001
     """Enqueue a scheduled job immediately."""
     from family_intranet.jobs.garmin.runner import run_garmin_load  # noqa: PLC0415
     from family_intranet.jobs.heartbeat import worker_heartbeat  # noqa: PLC0415
+    from family_intranet.jobs.refresh import (  # noqa: PLC0415
+        REFRESHES,
+        refresh_repository_cache,
+    )
 
     enqueue_map = {
         "garmin_load": run_garmin_load,
         "worker_heartbeat": worker_heartbeat,
     }
+    args: list[str] = []
     task_fn = enqueue_map.get(job_id)
+    name = job_id.removeprefix("refresh_")
+    if task_fn is None and name in REFRESHES:
+        task_fn, args = refresh_repository_cache, [name]
     if task_fn is None:
         return JsonResponse(
             {"success": False, "error": f"Unbekannter Job: {job_id}"}, status=404
         )
-    result = task_fn.enqueue()
+    result = task_fn.enqueue(*args)
     return JsonResponse({"success": True, "task_id": str(result.id)})
 
 
@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 set -e
 
-uv run python manage.py db_worker --no-reload --no-startup-delay
+uv run python manage.py db_worker --no-reload --no-startup-delay --queue-name "${WORKER_QUEUE_NAMES:-default}"
@@ -2,4 +2,5 @@
 set -e
 
 uv run python manage.py migrate
+uv run python manage.py createcachetable
 uv run python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Compressed on-disk archive of raw Garmin Connect API responses.
+
+Every response is stored as ``<root>/<yyyy>/<yyyy-mm-dd>/<endpoint>.json.gz``,
+where the endpoint is the name of the ``Garmin`` client method. The archive lets
+all tables be rebuilt from disk without hitting the Garmin API again.
+"""
+
+import functools
+import gzip
+import json
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".json.gz"
+
+
+class GarminArchive:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    @classmethod
+    def from_settings(cls) -> "GarminArchive | None":
+        """The configured archive, or ``None`` if archiving is disabled."""
+        if not settings.GARMIN_ARCHIVE_PATH:
+            return None
+        return cls(Path(settings.GARMIN_ARCHIVE_PATH).expanduser())
+
+    def path(self, measure_date: date, endpoint: str) -> Path:
+        return (
+            self.root
+            / f"{measure_date.year:04d}"
+            / measure_date.isoformat()
+            / f"{endpoint}{_SUFFIX}"
+        )
+
+    def save(self, measure_date: date, endpoint: str, payload: Any) -> None:
+        path = self.path(measure_date, endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(payload, f)
+        tmp_path.replace(path)
+
+    def load(self, measure_date: date, endpoint: str) -> Any:
+        """Raises ``FileNotFoundError`` if the response was never archived."""
+        with gzip.open(self.path(measure_date, endpoint), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def dates(self) -> list[date]:
+        """All days with at least one archived response, in ascending order."""
+        return sorted(
+            date.fromisoformat(day_dir.name)
+            for day_dir in self.root.glob("*/*")
+            if day_dir.is_dir() and any(day_dir.glob(f"*{_SUFFIX}"))
+        )
+
+
+def _call_date(args: tuple[Any, ...], kwargs: dict[str, Any]) -> date:
+    """The day a client call is for: its first ISO date argument."""
+    for value in (*args, *kwargs.values()):
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value)
+            except ValueError:
+                continue
+    msg = f"No date argument in Garmin call ({args=}, {kwargs=})."
+    raise ValueError(msg)
+
+
+class ArchivingGarmin:
+    """Proxy around a ``Garmin`` client that archives every ``get_*`` response."""
+
+    def __init__(self, garmin: Any, archive: GarminArchive) -> None:
+        self._garmin = garmin
+        self._archive = archive
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._garmin, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def archived(*args: Any, **kwargs: Any) -> Any:
+            payload = attr(*args, **kwargs)
+            self._archive.save(_call_date(args, kwargs), name, payload)
+            return payload
+
+        return archived
+
+
+class ArchivedGarmin:
+    """Stand-in for the ``Garmin`` client that answers ``get_*`` calls from disk."""
+
+    def __init__(self, archive: GarminArchive) -> None:
+        self._archive = archive
+
+    def __getattr__(self, name: str) -> Any:
+        if not name.startswith("get_"):
+            raise AttributeError(name)
+
+        def replayed(*args: Any, **kwargs: Any) -> Any:
+            return self._archive.load(_call_date(args, kwargs), name)
+
+        return replayed
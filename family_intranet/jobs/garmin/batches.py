@@ -0,0 +1,142 @@
+"""Columnar batches of Garmin rows.
+
+A ``ColumnBatch`` holds the rows of one table as parallel columns instead of one
+ORM object per data point. Loaders fill timestamp columns with epoch
+milliseconds in an ``array("q")`` (8 bytes per point); they are only turned into
+datetimes while the batch is written.
+"""
+
+from array import array
+from collections.abc import Iterable, Iterator, MutableSequence, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import DateTime
+
+from family_intranet.jobs.garmin import timestamps
+
+if TYPE_CHECKING:
+    from family_intranet.jobs.garmin.db import Base
+
+Column = MutableSequence[Any]
+
+
+@dataclass
+class ColumnBatch:
+    """Rows of ``model`` as one sequence per table column, all of equal length.
+
+    Columns may be plain lists or ``array``\\s. ``DateTime`` columns given as an
+    integer ``array`` hold epoch milliseconds.
+    """
+
+    model: "type[Base]"
+    columns: dict[str, Column]
+
+    def __post_init__(self) -> None:
+        expected = set(self.column_names)
+        if set(self.columns) != expected:
+            msg = (
+                f"Columns {sorted(self.columns)} do not match table "
+                f"{self.model.__tablename__} ({sorted(expected)})."
+            )
+            raise ValueError(msg)
+        if len({len(values) for values in self.columns.values()}) > 1:
+            msg = f"Columns of the {self.model.__tablename__} batch differ in length."
+            raise ValueError(msg)
+
+    @classmethod
+    def from_objects(
+        cls, model: "type[Base]", objects: Iterable["Base"]
+    ) -> "ColumnBatch":
+        batch = cls(model, {name: [] for name in _column_names(model)})
+        for o in objects:
+            for name, values in batch.columns.items():
+                values.append(getattr(o, name))
+        return batch
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return _column_names(self.model)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+    def _is_epoch_millis(self, name: str) -> bool:
+        return isinstance(self.columns[name], array) and isinstance(
+            self.model.__table__.columns[name].type, DateTime
+        )
+
+    def rows(self) -> Iterator[tuple[Any, ...]]:
+        """Rows as tuples in table column order, with timestamps as datetimes."""
+        return zip(
+            *(
+                timestamps.millis_to_berlin(self.columns[name])
+                if self._is_epoch_millis(name)
+                else self.columns[name]
+                for name in self.column_names
+            ),
+            strict=True,
+        )
+
+    def take(self, indices: Sequence[int]) -> "ColumnBatch":
+        """A new batch with the rows at ``indices``, keeping the column types."""
+        return ColumnBatch(
+            self.model,
+            {
+                name: _new_column(values, (values[i] for i in indices))
+                for name, values in self.columns.items()
+            },
+        )
+
+    def extend(self, other: "ColumnBatch") -> None:
+        if other.model is not self.model:
+            msg = f"Cannot extend a {self.model.__name__} batch with {other.model.__name__}."
+            raise ValueError(msg)
+        for name, values in self.columns.items():
+            if type(values) is not type(other.columns[name]):
+                msg = f"Column {name} of the {self.model.__name__} batches differs in type."
+                raise ValueError(msg)
+            values.extend(other.columns[name])
+
+    def deduplicated(self) -> "ColumnBatch":
+        """Keep only the last row per primary key, like repeated upserts would."""
+        primary_keys = [self.columns[c.key] for c in self.model.__table__.primary_key]
+        last_index = {key: i for i, key in enumerate(zip(*primary_keys, strict=True))}
+        if len(last_index) == len(self):
+            return self
+        return self.take(sorted(last_index.values()))
+
+    def since(self, name: str, tstamp: datetime) -> "ColumnBatch":
+        """Keep only the rows whose timestamp column ``name`` is ``>= tstamp``."""
+        threshold = (
+            timestamps.epoch_millis(tstamp) if self._is_epoch_millis(name) else tstamp
+        )
+        values = self.columns[name]
+        return self.take([i for i, value in enumerate(values) if value >= threshold])
+
+
+def _column_names(model: "type[Base]") -> tuple[str, ...]:
+    return tuple(c.key for c in model.__table__.columns)
+
+
+def _new_column(like: Column, values: Iterable[Any]) -> Column:
+    if isinstance(like, array):
+        return array(like.typecode, values)
+    return list(values)
+
+
+def concat(batches: Sequence[ColumnBatch]) -> ColumnBatch:
+    """Rows of several batches of the same model; a single batch is returned as is."""
+    first, *rest = batches
+    if not rest:
+        return first
+    merged = first.take(range(len(first)))
+    for batch in rest:
+        merged.extend(batch)
+    return merged
+
+
+def row_count(objects: Iterable["Base | ColumnBatch"]) -> int:
+    """Number of rows in a mix of ORM objects and column batches."""
+    return sum(len(o) if isinstance(o, ColumnBatch) else 1 for o in objects)
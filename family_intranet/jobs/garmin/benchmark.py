@@ -0,0 +1,241 @@
+"""Offline benchmarks for the Garmin ingest pipeline.
+
+The micro-benchmarks need neither the Garmin API nor a database. The loader
+benchmark replays archived Garmin responses through every registered loader
+into a PostgreSQL database, rolling back each day's writes.
+"""
+
+import contextlib
+import logging
+import time
+import timeit
+import tracemalloc
+from array import array
+from collections.abc import Callable, Generator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+import psycopg
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
+
+from family_intranet.jobs.garmin import db, loaders, models, registry, timestamps
+from family_intranet.jobs.garmin.archive import ArchivedGarmin, GarminArchive
+from family_intranet.jobs.garmin.batches import ColumnBatch
+
+log = logging.getLogger(__name__)
+
+# Two weeks of two-minute samples, starting shortly before a DST switch.
+_START = datetime(2026, 3, 22, tzinfo=UTC)
+_STEP = timedelta(minutes=2)
+
+
+@dataclass(frozen=True, kw_only=True)
+class BenchmarkResult:
+    name: str
+    points: int
+    seconds: float
+
+    @property
+    def points_per_second(self) -> float:
+        return self.points / self.seconds
+
+
+def _best_of(func: Callable[[], object], *, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def benchmark_timestamp_conversion(
+    *, points: int = 14 * 720, repeat: int = 5
+) -> list[BenchmarkResult]:
+    """Compare the per-row timestamp helpers with the batch converters."""
+    tstamps = [_START + i * _STEP for i in range(points)]
+    millis = [int(t.timestamp() * 1000) for t in tstamps]
+    strings = [
+        t.replace(tzinfo=None).isoformat(timespec="milliseconds") for t in tstamps
+    ]
+
+    cases: dict[str, Callable[[], object]] = {
+        "millis per row": lambda: [
+            loaders._unix_timestamp_millis_to_europe_berlin_datetime(t) for t in millis
+        ],
+        "millis batch": lambda: timestamps.millis_to_berlin(millis),
+        "iso strings per row": lambda: [
+            loaders._unaware_utc_string_to_europe_berlin_datetime(s) for s in strings
+        ],
+        "iso strings batch": lambda: timestamps.utc_strings_to_berlin(strings),
+    }
+    return [
+        BenchmarkResult(name=name, points=points, seconds=_best_of(func, repeat=repeat))
+        for name, func in cases.items()
+    ]
+
+
+@dataclass(frozen=True, kw_only=True)
+class MemoryResult:
+    name: str
+    points: int
+    peak_bytes: int
+
+    @property
+    def bytes_per_point(self) -> float:
+        return self.peak_bytes / self.points
+
+
+def _peak_bytes(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        result = func()  # noqa: F841 - keep the result alive until the peak is taken
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_heart_rate_memory(*, points: int = 14 * 720) -> list[MemoryResult]:
+    """Compare the memory of heart rate points as ORM objects and as a batch."""
+    values = [
+        [int((_START + i * _STEP).timestamp() * 1000), 60 + i % 40]
+        for i in range(points)
+    ]
+    cases: dict[str, Callable[[], object]] = {
+        "heart rate objects": lambda: [
+            models.HeartRate(tstamp=tstamp, heart_rate=entry[1])
+            for tstamp, entry in zip(
+                timestamps.millis_to_berlin(entry[0] for entry in values),
+                values,
+                strict=True,
+            )
+        ],
+        "heart rate batch": lambda: ColumnBatch(
+            models.HeartRate,
+            {
+                "tstamp": array("q", (entry[0] for entry in values)),
+                "heart_rate": [entry[1] for entry in values],
+            },
+        ),
+    }
+    return [
+        MemoryResult(name=name, points=points, peak_bytes=_peak_bytes(func))
+        for name, func in cases.items()
+    ]
+
+
+@dataclass(frozen=True, kw_only=True)
+class LoaderResult:
+    loader: str
+    days: int
+    rows: int
+    statements: int
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def statements_per_day(self) -> float:
+        return self.statements / self.days if self.days else 0.0
+
+
+class _StatementCounter:
+    """Counts statements (including ``COPY``) sent through an engine's cursors.
+
+    Also sees the statements the datastore issues on the raw psycopg connection,
+    which SQLAlchemy's execute events miss.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        counter = self
+
+        class CountingCursor(psycopg.Cursor):
+            def execute(self, *args: Any, **kwargs: Any) -> Any:
+                counter.count += 1
+                return super().execute(*args, **kwargs)
+
+            def executemany(self, *args: Any, **kwargs: Any) -> Any:
+                counter.count += 1
+                return super().executemany(*args, **kwargs)
+
+            def copy(self, *args: Any, **kwargs: Any) -> Any:
+                counter.count += 1
+                return super().copy(*args, **kwargs)
+
+        self._cursor_factory = CountingCursor
+
+    @contextlib.contextmanager
+    def attached(self, engine: Engine) -> Generator[None]:
+        def on_checkout(dbapi_connection: Any, *_args: Any) -> None:
+            dbapi_connection.cursor_factory = self._cursor_factory
+
+        def on_checkin(dbapi_connection: Any, *_args: Any) -> None:
+            if dbapi_connection is not None:
+                dbapi_connection.cursor_factory = psycopg.Cursor
+
+        event.listen(engine, "checkout", on_checkout)
+        event.listen(engine, "checkin", on_checkin)
+        try:
+            yield
+        finally:
+            event.remove(engine, "checkout", on_checkout)
+            event.remove(engine, "checkin", on_checkin)
+
+
+def benchmark_loaders(
+    engine: Engine,
+    archive: GarminArchive,
+    dates: Sequence[date],
+    *,
+    bulk_load: str | None = None,
+    chunk_size: int = db.UPSERT_CHUNK_SIZE,
+) -> list[LoaderResult]:
+    """Replay archived days through each loader and write them to ``engine``.
+
+    Wall time covers reading the archive, parsing and writing. Peak memory is
+    the largest traced peak of a single day, taken in a second pass so that
+    tracing does not skew the timings. Writes are rolled back, so the
+    database only needs the schema and partitions for the days.
+    """
+    garmin_client = ArchivedGarmin(archive)
+    counter = _StatementCounter()
+    results = []
+    for spec in registry.LOADERS.values():
+
+        def load(measure_date: date, spec: registry.LoaderSpec = spec) -> int:
+            rows = spec.load(measure_date=measure_date, garmin_client=garmin_client)
+            with Session(engine) as session:
+                written = db.upsert_objects(
+                    rows, session=session, chunk_size=chunk_size, bulk_load=bulk_load
+                )
+                session.rollback()
+            return written
+
+        loaded, rows, seconds = [], 0, 0.0
+        counter.count = 0
+        with counter.attached(engine):
+            for measure_date in dates:
+                start = time.perf_counter()
+                try:
+                    rows += load(measure_date)
+                except FileNotFoundError as e:
+                    log.warning("Skipping %s for %s: %s", spec.name, measure_date, e)
+                    continue
+                seconds += time.perf_counter() - start
+                loaded.append(measure_date)
+            statements = counter.count
+
+        results.append(
+            LoaderResult(
+                loader=spec.name,
+                days=len(loaded),
+                rows=rows,
+                statements=statements,
+                seconds=seconds,
+                peak_bytes=max(
+                    (_peak_bytes(lambda d=d: load(d)) for d in loaded), default=0
+                ),
+            )
+        )
+    return results
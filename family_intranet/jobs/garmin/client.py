@@ -1,18 +1,360 @@
-from time import sleep
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
 
+import requests
 from django.conf import settings
-from garminconnect import Garmin
+from garminconnect import Garmin, GarminConnectTooManyRequestsError
 
 from family_intranet.jobs.garmin.auth import get_auth_token
+from family_intranet.jobs.garmin.ratelimit import AdaptiveConcurrencyLimit, TokenBucket
+from family_intranet.otel import METRIC_PREFIX, get_meter
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("garmin")
+_cache_requests = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.client.cache.requests",
+    description="Garmin API calls seen by the per-run response cache, by hit or miss",
+)
+_retries = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.client.retries",
+    description="Retried Garmin API calls, by endpoint and reason",
+)
+_retry_failures = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.client.retry.failures",
+    description="Garmin API calls that failed after all retries, by endpoint and reason",
+)
+_token_refreshes = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.client.token.refreshes",
+    description="Garmin OAuth2 token refreshes, by outcome",
+)
+
+# Retry delay of the token refresher after a failed refresh, doubled with each
+# further failure up to the maximum, in seconds.
+_REFRESH_RETRY_DELAY = 60
+_REFRESH_MAX_RETRY_DELAY = 3600
+
+
+class GarminSession:
+    """Logged-in ``Garmin`` client shared by all load runs of the process.
+
+    The client, including its HTTP session, is created on first use and reused
+    by every later run and backfill task, so a run does not pay for a login. A
+    daemon thread refreshes the OAuth2 token ``refresh_margin`` seconds before
+    it expires and saves the tokens to ``token_path``; only if Garmin rejects
+    the tokens is a full login with credentials done. Failed refreshes and
+    logins are retried with exponential backoff.
+    """
+
+    def __init__(self, token_path: str, *, refresh_margin: float) -> None:
+        self._token_path = token_path
+        self._refresh_margin = refresh_margin
+        self._garmin: Garmin | None = None
+        self._lock = threading.Lock()
+
+    def client(self) -> Garmin:
+        with self._lock:
+            if self._garmin is None:
+                self._garmin = self._login()
+                threading.Thread(
+                    target=self._refresh_loop, name="garmin-token-refresh", daemon=True
+                ).start()
+            return self._garmin
+
+    def _login(self) -> Garmin:
+        garmin = Garmin()
+        try:
+            garmin.login(self._token_path)
+        except FileNotFoundError:
+            logger.info("No Garmin tokens in %s, logging in.", self._token_path)
+            get_auth_token()
+            garmin.login(self._token_path)
+        return garmin
+
+    def _seconds_until_refresh(self) -> float:
+        expires_at = self._garmin.garth.oauth2_token.expires_at
+        return expires_at - time.time() - self._refresh_margin
+
+    def refresh(self) -> None:
+        """Refresh the OAuth2 token in place and save the tokens.
+
+        Only if Garmin rejects the refresh (401) are the credentials used for a
+        full login; other failures are raised for the refresher to retry.
+        """
+        with self._lock:
+            garth_client = self._garmin.garth
+            try:
+                garth_client.refresh_oauth2()
+            except Exception as e:
+                if not _is_auth_error(e):
+                    raise
+                logger.warning(
+                    "Garmin rejected the token refresh, logging in again.",
+                    exc_info=True,
+                )
+            else:
+                garth_client.dump(self._token_path)
+                _token_refreshes.add(1, {"result": "refreshed"})
+                logger.info(
+                    "Refreshed Garmin OAuth2 token, next refresh in %.0f s.",
+                    self._seconds_until_refresh(),
+                )
+                return
+        # The SSO login is slow, so ``client()`` callers keep the current
+        # client meanwhile.
+        get_auth_token()
+        with self._lock:
+            garth_client.load(self._token_path)
+        _token_refreshes.add(1, {"result": "login"})
+        logger.info(
+            "Logged in to Garmin again, next refresh in %.0f s.",
+            self._seconds_until_refresh(),
+        )
+
+    def _refresh_loop(self) -> None:
+        failures = 0
+        while True:
+            time.sleep(max(self._seconds_until_refresh(), 0))
+            try:
+                self.refresh()
+            except Exception:
+                delay = min(
+                    _REFRESH_RETRY_DELAY * 2**failures, _REFRESH_MAX_RETRY_DELAY
+                )
+                failures += 1
+                logger.exception(
+                    "Garmin token refresh failed, retrying in %d s.", delay
+                )
+                _token_refreshes.add(1, {"result": "failed"})
+                time.sleep(delay)
+            else:
+                failures = 0
+
+
+def _is_auth_error(error: Exception) -> bool:
+    """Whether Garmin rejected the tokens, e.g. an expired OAuth1 token."""
+    response = _http_response(error)
+    return response is not None and response.status_code == 401  # noqa: PLR2004
+
+
+_session: GarminSession | None = None
+_session_lock = threading.Lock()
 
 
 def get_garmin_client() -> Garmin:
-    garmin = Garmin()
+    """Return the process-wide logged-in Garmin client, logging in on first use."""
+    global _session  # noqa: PLW0603
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = GarminSession(
+                    settings.GARMIN_AUTH_TOKEN_PATH,
+                    refresh_margin=settings.GARMIN_TOKEN_REFRESH_MARGIN,
+                )
+    return _session.client()
+
+
+class RateLimitedGarmin:
+    """Proxy around a ``Garmin`` client that rate limits all ``get_*`` API calls.
+
+    Safe to share between threads; every call takes a token from the bucket.
+    """
+
+    def __init__(self, garmin: Garmin, limiter: TokenBucket) -> None:
+        self._garmin = garmin
+        self._limiter = limiter
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._garmin, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def rate_limited(*args: Any, **kwargs: Any) -> Any:
+            self._limiter.acquire()
+            return attr(*args, **kwargs)
+
+        return rate_limited
+
+
+def _http_response(error: BaseException) -> requests.Response | None:
+    """The HTTP response behind a Garmin client error, if there is one.
+
+    ``garminconnect`` wraps the ``requests`` (or ``garth``) HTTP error that
+    carries the response as the cause of its own exceptions.
+    """
+    cause: BaseException | None = error
+    while cause is not None:
+        for candidate in (cause, getattr(cause, "error", None)):
+            response = getattr(candidate, "response", None)
+            if isinstance(response, requests.Response):
+                return response
+        cause = cause.__cause__
+    return None
+
+
+def _retry_reason(error: Exception) -> str | None:
+    """Why a failed call is worth retrying, or None if it is not."""
+    response = _http_response(error)
+    status = response.status_code if response is not None else None
+    if isinstance(error, GarminConnectTooManyRequestsError) or status == 429:  # noqa: PLR2004
+        return "throttled"
+    if status is not None and status >= 500:  # noqa: PLR2004
+        return "server_error"
+    cause: BaseException | None = error
+    while cause is not None:
+        if isinstance(cause, (requests.ConnectionError, requests.Timeout)):
+            return "connection"
+        cause = cause.__cause__
+    return None
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds to wait according to the ``Retry-After`` header, if sent."""
+    response = _http_response(error)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
     try:
-        garmin.login(settings.GARMIN_AUTH_TOKEN_PATH)
-    except FileNotFoundError:
-        sleep(10)
-        get_auth_token()
-        sleep(10)
-        garmin.login(settings.GARMIN_AUTH_TOKEN_PATH)
-    return garmin
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0.0)
+
+
+class RetryingGarmin:
+    """Proxy around a ``Garmin`` client that retries transient ``get_*`` failures.
+
+    Throttled calls (429), server errors (5xx) and connection errors are retried
+    up to ``max_retries`` times with exponential backoff and full jitter, or
+    after the delay the server asks for in ``Retry-After``. Calls run within the
+    adaptive concurrency ``limit``, which is halved whenever Garmin throttles
+    and grows back with successful calls. Other errors are raised right away.
+    """
+
+    def __init__(
+        self,
+        garmin: Garmin | RateLimitedGarmin,
+        limit: AdaptiveConcurrencyLimit,
+        *,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float,
+    ) -> None:
+        self._garmin = garmin
+        self._limit = limit
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+
+    def _delay(self, attempt: int, error: Exception) -> float | None:
+        """Seconds before the next attempt, None if it is not worth waiting."""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return retry_after if retry_after <= self._max_delay else None
+        return random.uniform(0, min(self._max_delay, self._base_delay * 2**attempt))
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._garmin, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def retrying(*args: Any, **kwargs: Any) -> Any:
+            attempt = 0
+            while True:
+                try:
+                    with self._limit.slot():
+                        response = attr(*args, **kwargs)
+                except Exception as e:
+                    reason = _retry_reason(e)
+                    if reason is None:
+                        raise
+                    if reason == "throttled":
+                        self._limit.on_throttle()
+                    delay = self._delay(attempt, e)
+                    if attempt >= self._max_retries or delay is None:
+                        _retry_failures.add(1, {"endpoint": name, "reason": reason})
+                        raise
+                    _retries.add(1, {"endpoint": name, "reason": reason})
+                    logger.warning(
+                        "Garmin %s failed (%s), retry %d/%d in %.1f s: %s",
+                        name,
+                        reason,
+                        attempt + 1,
+                        self._max_retries,
+                        delay,
+                        e,
+                    )
+                    time.sleep(delay)
+                    attempt += 1
+                else:
+                    self._limit.on_success()
+                    return response
+
+        return retrying
+
+
+class CachingGarmin:
+    """Proxy around a ``Garmin`` client that memoises ``get_*`` responses.
+
+    Responses are keyed on endpoint and arguments and kept for the lifetime of
+    the proxy, i.e. one load run. Concurrent calls for the same key wait for the
+    first caller instead of fetching again; failed calls are not cached.
+    """
+
+    def __init__(self, garmin: Garmin | RateLimitedGarmin | RetryingGarmin) -> None:
+        self._garmin = garmin
+        self._responses: dict[tuple, Future[Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def forget(self, argument: str) -> None:
+        """Drop all cached responses that were requested with ``argument``."""
+        with self._lock:
+            for key in [key for key in self._responses if argument in key[1]]:
+                del self._responses[key]
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._garmin, name)
+        if not name.startswith("get_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def cached(*args: Any, **kwargs: Any) -> Any:
+            key = (name, (*args, *kwargs.values()), tuple(kwargs))
+            with self._lock:
+                response = self._responses.get(key)
+                is_miss = response is None
+                if is_miss:
+                    response = self._responses[key] = Future()
+                    self.misses += 1
+                else:
+                    self.hits += 1
+            _cache_requests.add(
+                1, {"endpoint": name, "result": "miss" if is_miss else "hit"}
+            )
+
+            if is_miss:
+                try:
+                    response.set_result(attr(*args, **kwargs))
+                except Exception as e:
+                    with self._lock:
+                        del self._responses[key]
+                    response.set_exception(e)
+                    raise
+            return response.result()
+
+        return cached
@@ -1,18 +1,51 @@
 import logging
-from collections.abc import Iterable
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from itertools import islice
+from typing import Any
 
 from django.conf import settings
-from sqlalchemy import URL, create_engine
+from psycopg import sql
+from sqlalchemy import (
+    URL,
+    Engine,
+    Select,
+    column,
+    create_engine,
+    event,
+    func,
+    select,
+    table,
+)
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass, Session
 
+from family_intranet.jobs.garmin.batches import ColumnBatch, concat
+from family_intranet.otel import METRIC_PREFIX, get_meter, observe_connection_pool
+
 log = logging.getLogger(__name__)
 
+_meter = get_meter("garmin")
+_pool_connects = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.db.connections.opened",
+    description="New DBAPI connections opened by the Garmin datastore pool",
+)
+
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+# PostgreSQL accepts at most 65535 bind parameters per statement.
+_MAX_BIND_PARAMS = 65_535
+UPSERT_CHUNK_SIZE = 1_000
+
 
 class Base(MappedAsDataclass, DeclarativeBase):
     """subclasses will be converted to dataclasses"""
 
 
-def get_engine():
+def _create_engine() -> Engine:
     url = URL.create(
         drivername="postgresql+psycopg",
         username=settings.GARMIN_DB_USER,
@@ -21,11 +54,33 @@ def get_engine():
         port=settings.GARMIN_DB_PORT,
         database=settings.GARMIN_DB_NAME,
     )
-    return create_engine(
+    engine = create_engine(
         url,
         echo=False,
+        pool_size=settings.GARMIN_DB_POOL_SIZE,
+        max_overflow=settings.GARMIN_DB_MAX_OVERFLOW,
+        pool_recycle=settings.GARMIN_DB_POOL_RECYCLE,
+        pool_pre_ping=settings.GARMIN_DB_POOL_PRE_PING,
         connect_args={"options": f"-csearch_path={settings.GARMIN_DB_SCHEMA}"},
     )
+    event.listen(engine, "connect", lambda *_: _pool_connects.add(1))
+    observe_connection_pool(engine.pool, "garmin")
+    log.info(
+        "Created Garmin datastore engine (pool_size=%d, max_overflow=%d).",
+        settings.GARMIN_DB_POOL_SIZE,
+        settings.GARMIN_DB_MAX_OVERFLOW,
+    )
+    return engine
+
+
+def get_engine() -> Engine:
+    """Return the process-wide Garmin datastore engine, creating it on first use."""
+    global _engine  # noqa: PLW0603
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
+    return _engine
 
 
 def save_objects(objects: Iterable[Base], *, upsert: bool = True):
@@ -37,3 +92,185 @@ def save_objects(objects: Iterable[Base], *, upsert: bool = True):
         else:
             session.add_all(objects)
         session.commit()
+
+
+def _primary_key_names(model: type[Base]) -> tuple[str, ...]:
+    return tuple(c.key for c in model.__table__.primary_key.columns)
+
+
+def _batches_by_model(
+    objects: Iterable[Base | ColumnBatch],
+) -> dict[type[Base], ColumnBatch]:
+    """Merge objects and batches into one column batch per model.
+
+    A multi-row ``ON CONFLICT DO UPDATE`` must not touch the same row twice, so
+    the batches are deduplicated on the primary key, later rows replacing
+    earlier ones (as repeated ``session.merge()`` calls would).
+    """
+    parts: dict[type[Base], list[ColumnBatch]] = defaultdict(list)
+    objects_by_model: dict[type[Base], list[Base]] = defaultdict(list)
+    for o in objects:
+        if isinstance(o, ColumnBatch):
+            parts[o.model].append(o)
+        else:
+            objects_by_model[type(o)].append(o)
+    for model, model_objects in objects_by_model.items():
+        parts[model].append(ColumnBatch.from_objects(model, model_objects))
+    return {model: concat(batches).deduplicated() for model, batches in parts.items()}
+
+
+def _on_conflict_update(model: type[Base], stmt):
+    primary_keys = _primary_key_names(model)
+    update_columns = {
+        c.key: stmt.excluded[c.key]
+        for c in model.__table__.columns
+        if c.key not in primary_keys
+    }
+    if not update_columns:
+        return stmt.on_conflict_do_nothing(index_elements=primary_keys)
+    return stmt.on_conflict_do_update(index_elements=primary_keys, set_=update_columns)
+
+
+def _upsert_statement(model: type[Base], rows: Sequence[dict[str, Any]]):
+    return _on_conflict_update(model, insert(model.__table__).values(rows))
+
+
+def _upsert_rows(session: Session, batch: ColumnBatch, *, chunk_size: int) -> None:
+    names = batch.column_names
+    chunk_size = max(1, min(chunk_size, _MAX_BIND_PARAMS // len(names)))
+    rows = batch.rows()
+    while chunk := [
+        dict(zip(names, row, strict=True)) for row in islice(rows, chunk_size)
+    ]:
+        session.execute(_upsert_statement(batch.model, chunk))
+
+
+def _copy_rows(session: Session, batch: ColumnBatch) -> None:
+    """Stream rows into a temp staging table via ``COPY``, then merge them.
+
+    The staging table mirrors the target and is dropped again right after the
+    ``INSERT ... SELECT ... ON CONFLICT`` that moves the rows over, so a table
+    can be copied more than once per transaction.
+    """
+    target = batch.model.__table__
+    columns = list(batch.column_names)
+    staging_name = f"_staging_{target.name}"
+    staging = sql.Identifier(staging_name)
+    column_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+
+    driver_connection = session.connection().connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        cursor.execute(
+            sql.SQL(
+                "CREATE TEMP TABLE {} (LIKE {} INCLUDING DEFAULTS) ON COMMIT DROP"
+            ).format(staging, sql.Identifier(target.name))
+        )
+        with cursor.copy(
+            sql.SQL("COPY {} ({}) FROM STDIN").format(staging, column_list)
+        ) as copy:
+            for row in batch.rows():
+                copy.write_row(row)
+
+    staging_table = table(staging_name, *(column(c) for c in columns))
+    upsert_select(session, batch.model, columns, select(*staging_table.columns))
+
+    with driver_connection.cursor() as cursor:
+        cursor.execute(sql.SQL("DROP TABLE {}").format(staging))
+
+
+def upsert_select(
+    session: Session, model: type[Base], columns: Sequence[str], query: Select
+) -> None:
+    """``INSERT INTO model (columns) <query> ON CONFLICT`` on the primary key."""
+    session.execute(
+        _on_conflict_update(model, insert(model.__table__).from_select(columns, query))
+    )
+
+
+def upsert_objects(
+    objects: Iterable[Base | ColumnBatch],
+    *,
+    session: Session | None = None,
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    bulk_load: str | None = None,
+) -> int:
+    """Upsert objects and column batches with chunked ``INSERT ... ON CONFLICT``.
+
+    Conflicts are resolved on each model's primary key; all other columns are
+    overwritten. Tables marked with ``info={"bulk_load": "copy"}`` are loaded
+    through a ``COPY`` staging table instead; ``bulk_load`` ("copy" or
+    "insert") overrides the tables' choice, e.g. to compare both in benchmarks.
+    Without a session, a new one is opened and committed. Returns the number of
+    distinct rows written.
+    """
+    batches = _batches_by_model(objects)
+    if not batches:
+        return 0
+
+    if session is not None:
+        return _upsert_all(session, batches, chunk_size=chunk_size, bulk_load=bulk_load)
+
+    with Session(get_engine()) as own_session:
+        total = _upsert_all(
+            own_session, batches, chunk_size=chunk_size, bulk_load=bulk_load
+        )
+        own_session.commit()
+    return total
+
+
+def _upsert_all(
+    session: Session,
+    batches: dict[type[Base], ColumnBatch],
+    *,
+    chunk_size: int,
+    bulk_load: str | None,
+) -> int:
+    total = 0
+    for model, batch in batches.items():
+        if not batch:
+            continue
+        if (bulk_load or model.__table__.info.get("bulk_load")) == "copy":
+            _copy_rows(session, batch)
+        else:
+            _upsert_rows(session, batch, chunk_size=chunk_size)
+        log.debug("Upserted %d rows into %s.", len(batch), model.__tablename__)
+        total += len(batch)
+    return total
+
+
+def drop_stored_points(
+    session: Session,
+    objects: Iterable[Base | ColumnBatch],
+    *,
+    start: datetime,
+    end: datetime,
+) -> list[Base | ColumnBatch]:
+    """Drop points of delta-loaded tables that are already stored.
+
+    For tables marked with ``info={"delta_load": True}``, only objects and batch
+    rows at or after the latest timestamp stored in ``[start, end)`` are kept;
+    objects of all other tables pass through unchanged. The latest stored point
+    is always written again, since it may still be accumulating (e.g. the
+    current 15-minute steps interval).
+    """
+    latest: dict[type[Base], datetime | None] = {}
+    kept = []
+    for o in objects:
+        model = o.model if isinstance(o, ColumnBatch) else type(o)
+        if not model.__table__.info.get("delta_load"):
+            kept.append(o)
+            continue
+        (tstamp_column,) = model.__table__.primary_key.columns
+        if model not in latest:
+            latest[model] = session.scalar(
+                select(func.max(tstamp_column)).where(
+                    tstamp_column >= start, tstamp_column < end
+                )
+            )
+        if latest[model] is None:
+            kept.append(o)
+        elif isinstance(o, ColumnBatch):
+            kept.append(o.since(tstamp_column.key, latest[model]))
+        elif getattr(o, tstamp_column.key) >= latest[model]:
+            kept.append(o)
+    return kept
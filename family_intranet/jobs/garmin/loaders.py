@@ -1,11 +1,16 @@
 import logging
+from array import array
 from datetime import UTC, date, datetime
+from typing import TYPE_CHECKING
 
 import pytz
-from garminconnect import Garmin
 
-from family_intranet.jobs.garmin import models
-from family_intranet.jobs.garmin.db import save_objects
+from family_intranet.jobs.garmin import models, timestamps
+from family_intranet.jobs.garmin.batches import ColumnBatch
+from family_intranet.jobs.garmin.registry import Endpoint, LoaderSpec, Rows, register
+
+if TYPE_CHECKING:
+    from family_intranet.jobs.garmin.db import Base
 
 logger = logging.getLogger(__name__)
 
@@ -26,10 +31,25 @@ def _unix_timestamp_millis_to_europe_berlin_datetime(t: int | None) -> datetime
     )
 
 
-def get_heartrate_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of heart rate data points saved."""
-    logger.info("Getting heart rate data for %s.", measure_date)
-    data = garmin_client.get_heart_rates(measure_date.isoformat())
+def _millis_column(values: list, key: str | int) -> array:
+    return array("q", (entry[key] for entry in values))
+
+
+def _utc_string_column(values: list, key: str | int) -> array:
+    return timestamps.utc_strings_to_millis(entry[key] for entry in values)
+
+
+def _column(values: list, key: str | int) -> list:
+    return [entry[key] for entry in values]
+
+
+def _int_column(values: list, key: str | int) -> list:
+    return [int(entry[key]) for entry in values]
+
+
+def parse_heartrate_data(responses: dict, *, measure_date: date) -> Rows:
+    """Returns the daily heart rate stats and heart rate data points."""
+    data = responses["get_heart_rates"]
     heart_rates_daily = models.HeartRateDailyStats(
         measure_date=measure_date,
         resting_heart_rate=data["restingHeartRate"],
@@ -37,51 +57,37 @@ def get_heartrate_data(*, measure_date: date, garmin_client: Garmin) -> int:
         max_heart_rate=data["maxHeartRate"],
         last_seven_days_avg_resting_heart_rate=data["lastSevenDaysAvgRestingHeartRate"],
     )
-    if data["heartRateValues"] is not None:
-        heart_rates = tuple(
-            models.HeartRate(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(entry[0]),
-                heart_rate=entry[1],
-            )
-            for entry in data["heartRateValues"]
-        )
-    else:
-        heart_rates = ()
-
-    logger.info("Got %d heart rate data points. Saving.", len(heart_rates))
-    save_objects((heart_rates_daily,), upsert=True)
-    save_objects(heart_rates, upsert=True)
-    return len(heart_rates)
-
+    values = data["heartRateValues"] or []
+    heart_rates = ColumnBatch(
+        models.HeartRate,
+        {"tstamp": _millis_column(values, 0), "heart_rate": _column(values, 1)},
+    )
 
-def get_steps_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of steps data points saved."""
-    logger.info("Getting steps data for %s.", measure_date)
-    data = garmin_client.get_steps_data(measure_date.isoformat())
-    steps = tuple(
-        models.Steps(
-            tstamp_start=_unaware_utc_string_to_europe_berlin_datetime(
-                entry["startGMT"]
-            ),
-            tstamp_end=_unaware_utc_string_to_europe_berlin_datetime(entry["endGMT"]),
-            steps=entry["steps"],
-            pushes=entry["pushes"],
-            primaryActivityLevel=entry["primaryActivityLevel"],
-            activityLevelConstant=entry["activityLevelConstant"],
-        )
-        for entry in data
+    logger.info("Got %d heart rate data points.", len(heart_rates))
+    return (heart_rates_daily, heart_rates)
+
+
+def parse_steps_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the steps data points."""
+    data = responses["get_steps_data"]
+    steps = ColumnBatch(
+        models.Steps,
+        {
+            "tstamp_start": _utc_string_column(data, "startGMT"),
+            "tstamp_end": _utc_string_column(data, "endGMT"),
+            "steps": _column(data, "steps"),
+            "pushes": _column(data, "pushes"),
+            "primaryActivityLevel": _column(data, "primaryActivityLevel"),
+            "activityLevelConstant": _column(data, "activityLevelConstant"),
+        },
     )
-    logger.info("Got %d steps data points. Saving.", len(steps))
-    save_objects(steps, upsert=True)
-    return len(steps)
+    logger.info("Got %d steps data points.", len(steps))
+    return (steps,)
 
 
-def get_daily_steps_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of daily steps data points saved."""
-    logger.info("Getting daily steps data for %s.", measure_date)
-    data = garmin_client.get_daily_steps(
-        start=measure_date.isoformat(), end=measure_date.isoformat()
-    )
+def parse_daily_steps_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the daily steps data points."""
+    data = responses["get_daily_steps"]
     steps = tuple(
         models.StepsDaily(
             calendar_date=date.fromisoformat(entry["calendarDate"]),
@@ -91,39 +97,34 @@ def get_daily_steps_data(*, measure_date: date, garmin_client: Garmin) -> int:
         )
         for entry in data
     )
-    logger.info("Got %d daily steps data points. Saving.", len(steps))
-    save_objects(steps, upsert=True)
-    return len(steps)
-
-
-def get_floors_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of floors data points saved."""
-    logger.info("Getting floors data for %s.", measure_date)
-    data = garmin_client.get_floors(measure_date.isoformat())
-    floors = tuple(
-        models.Floors(
-            tstamp_start=_unaware_utc_string_to_europe_berlin_datetime(entry[0]),
-            tstamp_end=_unaware_utc_string_to_europe_berlin_datetime(entry[1]),
-            floorsAscended=entry[2],
-            floorsDescended=entry[3],
-        )
-        for entry in data.get("floorValuesArray", ())
+    logger.info("Got %d daily steps data points.", len(steps))
+    return steps
+
+
+def parse_floors_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the floors data points."""
+    data = responses["get_floors"]
+    values = data.get("floorValuesArray") or []
+    floors = ColumnBatch(
+        models.Floors,
+        {
+            "tstamp_start": _utc_string_column(values, 0),
+            "tstamp_end": _utc_string_column(values, 1),
+            "floorsAscended": _column(values, 2),
+            "floorsDescended": _column(values, 3),
+        },
     )
-    logger.info("Got %d floors data points. Saving.", len(floors))
-    save_objects(floors, upsert=True)
-    return len(floors)
-
-
-def get_stress_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of stress data points saved."""
-    logger.info("Getting stress data for %s.", measure_date)
-    data = garmin_client.get_stress_data(measure_date.isoformat())
-    stress = tuple(
-        models.Stress(
-            tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(entry[0]),
-            stress_level=entry[1],
-        )
-        for entry in data["stressValuesArray"]
+    logger.info("Got %d floors data points.", len(floors))
+    return (floors,)
+
+
+def parse_stress_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the daily stress stats and stress data points."""
+    data = responses["get_stress_data"]
+    values = data["stressValuesArray"] or []
+    stress = ColumnBatch(
+        models.Stress,
+        {"tstamp": _millis_column(values, 0), "stress_level": _column(values, 1)},
     )
     stress_daily = models.StressDaily(
         calendar_date=date.fromisoformat(data["calendarDate"]),
@@ -132,29 +133,26 @@ def get_stress_data(*, measure_date: date, garmin_client: Garmin) -> int:
         stress_chart_value_offset=data["stressChartValueOffset"],
         stress_chart_y_axis_origin=data["stressChartYAxisOrigin"],
     )
-    logger.info("Got %d stress data points. Saving.", len(stress))
-    save_objects(stress, upsert=True)
-    save_objects((stress_daily,), upsert=True)
-    return len(stress)
-
-
-def get_body_battery_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of body battery data points saved."""
-    logger.info("Getting body battery data for %s.", measure_date)
-    data_stress = garmin_client.get_stress_data(measure_date.isoformat())
-    body_battery = tuple(
-        models.BodyBattery(
-            tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(entry[0]),
-            body_battery_status=entry[1],
-            body_battery_level=entry[2],
-            body_battery_version=entry[3],
-        )
-        for entry in data_stress.get("bodyBatteryValuesArray", ())
+    logger.info("Got %d stress data points.", len(stress))
+    return (stress_daily, stress)
+
+
+def parse_body_battery_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the body battery data points, daily stats and activity events."""
+    data_stress = responses["get_stress_data"]
+    values = data_stress.get("bodyBatteryValuesArray") or []
+    body_battery = ColumnBatch(
+        models.BodyBattery,
+        {
+            "tstamp": _millis_column(values, 0),
+            "body_battery_status": _column(values, 1),
+            "body_battery_level": _column(values, 2),
+            "body_battery_version": _column(values, 3),
+        },
     )
-    logger.info("Got %d body battery data points. Saving.", len(body_battery))
-    save_objects(body_battery, upsert=True)
+    logger.info("Got %d body battery data points.", len(body_battery))
 
-    data_body = garmin_client.get_body_battery(measure_date.isoformat())
+    data_body = responses["get_body_battery"]
     body_battery_daily = models.BodyBatteryDaily(
         calendar_date=date.fromisoformat(data_body[0]["date"]),
         charged=data_body[0]["charged"],
@@ -164,7 +162,6 @@ def get_body_battery_data(*, measure_date: date, garmin_client: Garmin) -> int:
             "endOfDayBodyBatteryDynamicFeedbackEvent", {}
         ),
     )
-    save_objects((body_battery_daily,), upsert=True)
 
     body_battery_activity_events = tuple(
         models.BodyBatteryActivityEvent(
@@ -179,17 +176,16 @@ def get_body_battery_data(*, measure_date: date, garmin_client: Garmin) -> int:
         )
         for entry in data_body[0].get("bodyBatteryActivityEvent", ())
     )
-    save_objects(body_battery_activity_events, upsert=True)
-    return len(body_battery)
+    return (body_battery_daily, body_battery, *body_battery_activity_events)
 
 
-def _get_sleep_data_daily(data_sleep: dict, /) -> None:
+def _get_sleep_data_daily(data_sleep: dict, /) -> models.SleepDaily | None:
     daily_sleep = data_sleep["dailySleepDTO"]
     if daily_sleep["calendarDate"] is None:
         logger.info("No sleep data for this day (yet). Skipping.")
-        return
+        return None
 
-    sleep_daily = models.SleepDaily(
+    return models.SleepDaily(
         calendar_date=date.fromisoformat(daily_sleep["calendarDate"]),
         sleep_time_seconds=daily_sleep.get("sleepTimeSeconds"),
         nap_time_seconds=daily_sleep.get("napTimeSeconds"),
@@ -225,157 +221,161 @@ def _get_sleep_data_daily(data_sleep: dict, /) -> None:
         resting_heart_rate=data_sleep.get("restingHeartRate"),
         sleep_scores=daily_sleep.get("sleepScores"),
     )
-    save_objects((sleep_daily,), upsert=True)
-    logger.info("Saved sleep daily data.")
-
-
-def get_sleep_data(*, measure_date: date, garmin_client: Garmin) -> int:
-    """Returns the amount of sleep data points saved."""
-    logger.info("Getting sleep data for %s.", measure_date)
-
-    data_sleep = garmin_client.get_sleep_data(measure_date.isoformat())
-    _get_sleep_data_daily(data_sleep)
-
-    total = 0
-
-    if data_sleep.get("sleepMovement") is not None:
-        sleep_movements = tuple(
-            models.SleepMovement(
-                tstamp_start=_unaware_utc_string_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                tstamp_end=_unaware_utc_string_to_europe_berlin_datetime(
-                    entry["endGMT"]
-                ),
-                activity_level=entry["activityLevel"],
-            )
-            for entry in data_sleep["sleepMovement"]
-        )
-        save_objects(sleep_movements, upsert=True)
-        total += len(sleep_movements)
-        logger.info("Saved sleep movements data (%d rows).", len(sleep_movements))
-
-    if data_sleep.get("sleepLevels") is not None:
-        sleep_levels = tuple(
-            models.SleepLevels(
-                tstamp_start=_unaware_utc_string_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                tstamp_end=_unaware_utc_string_to_europe_berlin_datetime(
-                    entry["endGMT"]
-                ),
-                activity_level=int(entry["activityLevel"]),
-            )
-            for entry in data_sleep["sleepLevels"]
-        )
-        save_objects(sleep_levels, upsert=True)
-        total += len(sleep_levels)
-        logger.info("Saved sleep levels data (%d rows).", len(sleep_levels))
-
-    if data_sleep.get("sleepRestlessMoments") is not None:
-        sleep_restless_moments = tuple(
-            models.SleepRestlessMoments(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                value=int(entry["value"]),
-            )
-            for entry in data_sleep["sleepRestlessMoments"]
-        )
-        save_objects(sleep_restless_moments, upsert=True)
-        total += len(sleep_restless_moments)
-        logger.info(
-            "Saved sleep restless moments data (%d rows).", len(sleep_restless_moments)
-        )
 
-    if data_sleep.get("wellnessEpochSPO2DataDTOList") is not None:
-        sleep_spo2_data = tuple(
-            models.SleepSPO2Data(
-                tstamp=_unaware_utc_string_to_europe_berlin_datetime(
-                    entry["epochTimestamp"]
-                ),
-                epoch_duration=entry["epochDuration"],
-                spo2_value=entry["spo2Reading"],
-                reading_confidence=entry["readingConfidence"],
-            )
-            for entry in data_sleep["wellnessEpochSPO2DataDTOList"]
-        )
-        save_objects(sleep_spo2_data, upsert=True)
-        total += len(sleep_spo2_data)
-        logger.info("Saved sleep spo2 data (%d rows).", len(sleep_spo2_data))
-
-    if data_sleep.get("wellnessEpochRespirationDataDTOList") is not None:
-        sleep_respiration_data = tuple(
-            models.SleepRespirationData(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startTimeGMT"]
-                ),
-                respiration_value=int(entry["respirationValue"]),
-            )
-            for entry in data_sleep["wellnessEpochRespirationDataDTOList"]
-        )
-        save_objects(sleep_respiration_data, upsert=True)
-        total += len(sleep_respiration_data)
-        logger.info(
-            "Saved sleep respiration data (%d rows).", len(sleep_respiration_data)
-        )
 
-    if data_sleep.get("sleepHeartRate") is not None:
-        sleep_heart_rates = tuple(
-            models.SleepHeartRate(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                heart_rate=entry["value"],
-            )
-            for entry in data_sleep["sleepHeartRate"]
-        )
-        save_objects(sleep_heart_rates, upsert=True)
-        total += len(sleep_heart_rates)
-        logger.info("Saved sleep heart rate data (%d rows).", len(sleep_heart_rates))
-
-    if data_sleep.get("sleepStress") is not None:
-        sleep_stress_data = tuple(
-            models.SleepStress(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                stress_level=int(entry["value"]),
-            )
-            for entry in data_sleep["sleepStress"]
-        )
-        save_objects(sleep_stress_data, upsert=True)
-        total += len(sleep_stress_data)
-        logger.info("Saved sleep stress data (%d rows).", len(sleep_stress_data))
-
-    if data_sleep.get("sleepBodyBattery") is not None:
-        sleep_body_battery_data = tuple(
-            models.SleepBodyBattery(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                body_battery_level=int(entry["value"]),
-            )
-            for entry in data_sleep["sleepBodyBattery"]
-        )
-        save_objects(sleep_body_battery_data, upsert=True)
-        total += len(sleep_body_battery_data)
-        logger.info(
-            "Saved sleep body battery data (%d rows).", len(sleep_body_battery_data)
+# Series in the sleep response: model, response key and a (reader, entry key)
+# pair per table column.
+_SLEEP_SERIES = (
+    (
+        models.SleepMovement,
+        "sleepMovement",
+        {
+            "tstamp_start": (_utc_string_column, "startGMT"),
+            "tstamp_end": (_utc_string_column, "endGMT"),
+            "activity_level": (_column, "activityLevel"),
+        },
+    ),
+    (
+        models.SleepLevels,
+        "sleepLevels",
+        {
+            "tstamp_start": (_utc_string_column, "startGMT"),
+            "tstamp_end": (_utc_string_column, "endGMT"),
+            "activity_level": (_int_column, "activityLevel"),
+        },
+    ),
+    (
+        models.SleepRestlessMoments,
+        "sleepRestlessMoments",
+        {"tstamp": (_millis_column, "startGMT"), "value": (_int_column, "value")},
+    ),
+    (
+        models.SleepSPO2Data,
+        "wellnessEpochSPO2DataDTOList",
+        {
+            "tstamp": (_utc_string_column, "epochTimestamp"),
+            "epoch_duration": (_column, "epochDuration"),
+            "spo2_value": (_column, "spo2Reading"),
+            "reading_confidence": (_column, "readingConfidence"),
+        },
+    ),
+    (
+        models.SleepRespirationData,
+        "wellnessEpochRespirationDataDTOList",
+        {
+            "tstamp": (_millis_column, "startTimeGMT"),
+            "respiration_value": (_int_column, "respirationValue"),
+        },
+    ),
+    (
+        models.SleepHeartRate,
+        "sleepHeartRate",
+        {"tstamp": (_millis_column, "startGMT"), "heart_rate": (_column, "value")},
+    ),
+    (
+        models.SleepStress,
+        "sleepStress",
+        {
+            "tstamp": (_millis_column, "startGMT"),
+            "stress_level": (_int_column, "value"),
+        },
+    ),
+    (
+        models.SleepBodyBattery,
+        "sleepBodyBattery",
+        {
+            "tstamp": (_millis_column, "startGMT"),
+            "body_battery_level": (_int_column, "value"),
+        },
+    ),
+    (
+        models.SleepHRVData,
+        "hrvData",
+        {"tstamp": (_millis_column, "startGMT"), "hrv_value": (_int_column, "value")},
+    ),
+)
+
+
+def parse_sleep_data(responses: dict, *, measure_date: date) -> Rows:  # noqa: ARG001
+    """Returns the daily sleep stats and all sleep data points."""
+    data_sleep = responses["get_sleep_data"]
+    objects: list[Base | ColumnBatch] = []
+    sleep_daily = _get_sleep_data_daily(data_sleep)
+    if sleep_daily is not None:
+        objects.append(sleep_daily)
+
+    for model, response_key, columns in _SLEEP_SERIES:
+        values = data_sleep.get(response_key)
+        if values is None:
+            continue
+        batch = ColumnBatch(
+            model,
+            {name: read(values, key) for name, (read, key) in columns.items()},
         )
+        objects.append(batch)
+        logger.info("Got %s data (%d rows).", model.__tablename__, len(batch))
+
+    return tuple(objects)
 
-    if data_sleep.get("hrvData") is not None:
-        sleep_hrv_data = tuple(
-            models.SleepHRVData(
-                tstamp=_unix_timestamp_millis_to_europe_berlin_datetime(
-                    entry["startGMT"]
-                ),
-                hrv_value=int(entry["value"]),
-            )
-            for entry in data_sleep["hrvData"]
-        )
-        save_objects(sleep_hrv_data, upsert=True)
-        total += len(sleep_hrv_data)
-        logger.info("Saved sleep hrv data (%d rows).", len(sleep_hrv_data))
 
-    return total
+register(
+    LoaderSpec(
+        name="heartrate",
+        endpoints=(Endpoint("get_heart_rates"),),
+        parse=parse_heartrate_data,
+        models=(models.HeartRateDailyStats, models.HeartRate),
+    )
+)
+register(
+    LoaderSpec(
+        name="steps",
+        endpoints=(Endpoint("get_steps_data"),),
+        parse=parse_steps_data,
+        models=(models.Steps,),
+    )
+)
+register(
+    LoaderSpec(
+        name="daily_steps",
+        endpoints=(Endpoint("get_daily_steps", date_range=True),),
+        parse=parse_daily_steps_data,
+        models=(models.StepsDaily,),
+    )
+)
+register(
+    LoaderSpec(
+        name="floors",
+        endpoints=(Endpoint("get_floors"),),
+        parse=parse_floors_data,
+        models=(models.Floors,),
+    )
+)
+register(
+    LoaderSpec(
+        name="stress",
+        endpoints=(Endpoint("get_stress_data"),),
+        parse=parse_stress_data,
+        models=(models.StressDaily, models.Stress),
+    )
+)
+register(
+    LoaderSpec(
+        name="body_battery",
+        # Shares the stress response with the stress loader via the client cache.
+        endpoints=(Endpoint("get_stress_data"), Endpoint("get_body_battery")),
+        parse=parse_body_battery_data,
+        models=(
+            models.BodyBatteryDaily,
+            models.BodyBattery,
+            models.BodyBatteryActivityEvent,
+        ),
+    )
+)
+register(
+    LoaderSpec(
+        name="sleep",
+        endpoints=(Endpoint("get_sleep_data"),),
+        parse=parse_sleep_data,
+        models=(models.SleepDaily, *(model for model, _, _ in _SLEEP_SERIES)),
+    )
+)
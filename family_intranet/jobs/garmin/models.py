@@ -1,8 +1,9 @@
 import logging
 from datetime import date, datetime
+from enum import StrEnum
 from typing import Any
 
-from sqlalchemy import JSON, DateTime
+from sqlalchemy import JSON, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from family_intranet.jobs.garmin.db import Base
@@ -10,6 +11,21 @@ from family_intranet.jobs.garmin.db import Base
 log = logging.getLogger(__name__)
 
 
+def _partitioned_by_month(table_name: str, column: str, **info: Any) -> tuple:
+    """Table args of a time series partitioned by month on ``column``.
+
+    Partitions are created by ``partitions.ensure_partitions``; the BRIN index
+    keeps range scans within a partition cheap.
+    """
+    return (
+        Index(f"ix_{table_name}_{column}_brin", column, postgresql_using="brin"),
+        {
+            "info": {**info, "partition_by_month": column},
+            "postgresql_partition_by": f"RANGE ({column})",
+        },
+    )
+
+
 class HeartRateDailyStats(Base):
     __tablename__ = "heart_rate_daily"
 
@@ -22,6 +38,9 @@ class HeartRateDailyStats(Base):
 
 class HeartRate(Base):
     __tablename__ = "heart_rate"
+    __table_args__ = _partitioned_by_month(
+        "heart_rate", "tstamp", bulk_load="copy", delta_load=True
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     heart_rate: Mapped[int] = mapped_column(nullable=True)
@@ -29,6 +48,9 @@ class HeartRate(Base):
 
 class Steps(Base):
     __tablename__ = "steps"
+    __table_args__ = _partitioned_by_month(
+        "steps", "tstamp_start", bulk_load="copy", delta_load=True
+    )
 
     tstamp_start: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), primary_key=True
@@ -72,6 +94,9 @@ class StressDaily(Base):
 
 class Stress(Base):
     __tablename__ = "stress"
+    __table_args__ = _partitioned_by_month(
+        "stress", "tstamp", bulk_load="copy", delta_load=True
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     stress_level: Mapped[int]
@@ -91,6 +116,9 @@ class BodyBatteryDaily(Base):
 
 class BodyBattery(Base):
     __tablename__ = "body_battery"
+    __table_args__ = _partitioned_by_month(
+        "body_battery", "tstamp", bulk_load="copy", delta_load=True
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     body_battery_status: Mapped[str | None]
@@ -146,6 +174,9 @@ class SleepDaily(Base):
 
 class SleepMovement(Base):
     __tablename__ = "sleep_movement"
+    __table_args__ = _partitioned_by_month(
+        "sleep_movement", "tstamp_start", bulk_load="copy"
+    )
 
     tstamp_start: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), primary_key=True
@@ -156,6 +187,7 @@ class SleepMovement(Base):
 
 class SleepLevels(Base):
     __tablename__ = "sleep_levels"
+    __table_args__ = {"info": {"bulk_load": "copy"}}
 
     tstamp_start: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), primary_key=True
@@ -166,6 +198,7 @@ class SleepLevels(Base):
 
 class SleepRestlessMoments(Base):
     __tablename__ = "sleep_restless_moments"
+    __table_args__ = {"info": {"bulk_load": "copy"}}
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     value: Mapped[int]
@@ -173,6 +206,9 @@ class SleepRestlessMoments(Base):
 
 class SleepSPO2Data(Base):
     __tablename__ = "sleep_spo2_data"
+    __table_args__ = _partitioned_by_month(
+        "sleep_spo2_data", "tstamp", bulk_load="copy"
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     epoch_duration: Mapped[int | None]
@@ -182,6 +218,9 @@ class SleepSPO2Data(Base):
 
 class SleepRespirationData(Base):
     __tablename__ = "sleep_respiration_data"
+    __table_args__ = _partitioned_by_month(
+        "sleep_respiration_data", "tstamp", bulk_load="copy"
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     respiration_value: Mapped[int]
@@ -189,6 +228,9 @@ class SleepRespirationData(Base):
 
 class SleepHeartRate(Base):
     __tablename__ = "sleep_heart_rate"
+    __table_args__ = _partitioned_by_month(
+        "sleep_heart_rate", "tstamp", bulk_load="copy"
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     heart_rate: Mapped[int | None]
@@ -196,6 +238,7 @@ class SleepHeartRate(Base):
 
 class SleepStress(Base):
     __tablename__ = "sleep_stress"
+    __table_args__ = _partitioned_by_month("sleep_stress", "tstamp", bulk_load="copy")
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     stress_level: Mapped[int]
@@ -203,6 +246,9 @@ class SleepStress(Base):
 
 class SleepBodyBattery(Base):
     __tablename__ = "sleep_body_battery"
+    __table_args__ = _partitioned_by_month(
+        "sleep_body_battery", "tstamp", bulk_load="copy"
+    )
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     body_battery_level: Mapped[int]
@@ -210,6 +256,7 @@ class SleepBodyBattery(Base):
 
 class SleepHRVData(Base):
     __tablename__ = "sleep_hrv_data"
+    __table_args__ = {"info": {"bulk_load": "copy"}}
 
     tstamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     hrv_value: Mapped[int]
@@ -227,3 +274,53 @@ class GarminLoadRun(Base):
     )
     success: Mapped[bool] = mapped_column(default=False)
     error_message: Mapped[str | None] = mapped_column(default=None)
+
+
+class CheckpointStatus(StrEnum):
+    SUCCESS = "success"
+    FAILED = "failed"
+
+
+class GarminLoadCheckpoint(Base):
+    """Outcome of the latest run of one loader for one day."""
+
+    __tablename__ = "garmin_load_checkpoint"
+
+    loader: Mapped[str] = mapped_column(primary_key=True)
+    measure_date: Mapped[date] = mapped_column(primary_key=True)
+    status: Mapped[str]
+    row_count: Mapped[int]
+    fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    error_message: Mapped[str | None] = mapped_column(default=None)
+
+
+class RollupResolution(StrEnum):
+    MINUTE = "minute"
+    HOUR = "hour"
+
+
+class GarminRollup(Base):
+    """Aggregates of the Garmin series per minute or hour, see ``rollups``."""
+
+    __tablename__ = "garmin_rollup"
+
+    resolution: Mapped[str] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
+    heart_rate_min: Mapped[int | None]
+    heart_rate_avg: Mapped[float | None]
+    heart_rate_max: Mapped[int | None]
+    steps: Mapped[int | None]
+    stress_avg: Mapped[float | None]
+    body_battery_min: Mapped[int | None]
+    body_battery_max: Mapped[int | None]
+
+
+class GarminSchemaVersion(Base):
+    """Model schema hashes applied to the datastore, see ``schema.ensure_schema``."""
+
+    __tablename__ = "garmin_schema_version"
+
+    schema_hash: Mapped[str] = mapped_column(primary_key=True)
+    applied_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
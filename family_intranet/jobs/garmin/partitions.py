@@ -0,0 +1,213 @@
+"""Monthly range partitions of the Garmin time-series tables.
+
+Tables whose ``info`` has ``partition_by_month`` are created as
+``PARTITION BY RANGE`` tables with one partition per Europe/Berlin calendar
+month, named ``<table>_<yyyy>_<mm>``. Partitions are created on demand before
+data for a month is written, so range queries and retention only ever touch the
+months involved.
+"""
+
+import logging
+from collections.abc import Iterator
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from psycopg import sql
+from sqlalchemy import Connection, Engine, Table, text
+
+from family_intranet.jobs.garmin.db import Base
+
+log = logging.getLogger(__name__)
+
+_BERLIN = ZoneInfo("Europe/Berlin")
+
+# Serialises partition DDL between concurrent loads (e.g. backfill workers).
+_LOCK_KEY = "garmin_partitions"
+
+# (engine URL, month) pairs whose partitions this process has ensured; they are
+# never dropped, so later loads of these months skip the catalog lookup.
+_ensured_months: set[tuple[str, date]] = set()
+
+
+def partitioned_tables() -> list[Table]:
+    return [t for t in Base.metadata.sorted_tables if "partition_by_month" in t.info]
+
+
+def _months(start: date, end: date) -> Iterator[date]:
+    """First days of all months from ``start`` to ``end``, inclusive."""
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month += relativedelta(months=1)
+
+
+def _month_start(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=_BERLIN)
+
+
+def _lock(conn: Connection) -> None:
+    conn.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": _LOCK_KEY}
+    )
+
+
+def _create_partitions(conn: Connection, table: Table, start: date, end: date) -> None:
+    driver_connection = conn.connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        for month in _months(start, end):
+            cursor.execute(
+                sql.SQL(
+                    "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} "
+                    "FOR VALUES FROM ({}) TO ({})"
+                ).format(
+                    sql.Identifier(_partition_name(table, month)),
+                    sql.Identifier(table.name),
+                    sql.Literal(_month_start(month)),
+                    sql.Literal(_month_start(month + relativedelta(months=1))),
+                )
+            )
+
+
+def _partition_name(table: Table, month: date) -> str:
+    return f"{table.name}_{month:%Y_%m}"
+
+
+def _missing_partitions(
+    conn: Connection, tables: list[Table], start: date, end: date
+) -> list[Table]:
+    """Partitioned tables lacking a partition for any month of the range."""
+    names = {
+        _partition_name(table, month): table
+        for table in tables
+        for month in _months(start, end)
+    }
+    missing = conn.scalars(
+        text("SELECT name FROM unnest(:names) name WHERE to_regclass(name) IS NULL"),
+        {"names": list(names)},
+    )
+    return list(dict.fromkeys(names[name] for name in missing))
+
+
+def ensure_partitions(engine: Engine, start: date, end: date) -> None:
+    """Create the missing monthly partitions of all partitioned tables.
+
+    Covers the months from ``start`` to ``end`` (inclusive), padded by a day on
+    both sides since a day's data can reach into the neighbouring days (e.g.
+    the sleep of the night before). Months already ensured by this process are
+    skipped, and the locked DDL only runs if a partition is actually missing.
+    """
+    start -= relativedelta(days=1)
+    end += relativedelta(days=1)
+    months = {(str(engine.url), month) for month in _months(start, end)}
+    if months <= _ensured_months:
+        return
+
+    with engine.connect() as conn:
+        missing = _missing_partitions(conn, partitioned_tables(), start, end)
+    if missing:
+        with engine.begin() as conn:
+            _lock(conn)
+            for table in missing:
+                _create_partitions(conn, table, start, end)
+    _ensured_months.update(months)
+
+
+def _relkind(conn: Connection, table: Table) -> str | None:
+    return conn.scalar(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table.name},
+    )
+
+
+def heap_table_names(conn: Connection) -> set[str]:
+    """Names of partitioned tables that still exist as plain heap tables."""
+    return {t.name for t in partitioned_tables() if _relkind(conn, t) == "r"}
+
+
+def convert_heap_tables(engine: Engine) -> None:
+    """Convert tables created before partitioning into partitioned tables.
+
+    The old table's plain indexes are dropped and the table is renamed, the
+    partitioned table and the partitions covering its data are created, the
+    rows are copied over and the old table dropped, all in one transaction per
+    table.
+    """
+    for table in partitioned_tables():
+        with engine.begin() as conn:
+            _lock(conn)
+            if _relkind(conn, table) != "r":
+                continue
+
+            log.info("Converting %s to a monthly partitioned table.", table.name)
+            _convert_heap_table(conn, table)
+
+
+def _convert_heap_table(conn: Connection, table: Table) -> None:
+    heap_name = f"{table.name}_heap"
+    primary_key_name = conn.scalar(
+        text(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:name) AND contype = 'p'"
+        ),
+        {"name": table.name},
+    )
+    # Plain indexes would block the partitioned table's indexes of the same
+    # name; the constraint-backed primary key index is renamed below instead.
+    index_names = conn.scalars(
+        text(
+            "SELECT c.relname FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = to_regclass(:name) AND NOT EXISTS "
+            "(SELECT 1 FROM pg_constraint WHERE conindid = i.indexrelid)"
+        ),
+        {"name": table.name},
+    ).all()
+    column = table.columns[table.info["partition_by_month"]]
+    columns = sql.SQL(", ").join(sql.Identifier(c.name) for c in table.columns)
+    heap = sql.Identifier(heap_name)
+
+    driver_connection = conn.connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        for index_name in index_names:
+            cursor.execute(sql.SQL("DROP INDEX {}").format(sql.Identifier(index_name)))
+        cursor.execute(
+            sql.SQL("ALTER TABLE {} RENAME TO {}").format(
+                sql.Identifier(table.name), heap
+            )
+        )
+        if primary_key_name is not None:
+            # Frees the ``<table>_pkey`` name for the partitioned table.
+            cursor.execute(
+                sql.SQL("ALTER TABLE {} RENAME CONSTRAINT {} TO {}").format(
+                    heap,
+                    sql.Identifier(primary_key_name),
+                    sql.Identifier(f"{heap_name}_pkey"),
+                )
+            )
+        cursor.execute(
+            sql.SQL("SELECT min({0}), max({0}) FROM {1}").format(
+                sql.Identifier(column.name), heap
+            )
+        )
+        first, last = cursor.fetchone()
+
+    table.create(conn)
+    if first is None:
+        log.info("%s was empty.", table.name)
+    else:
+        _create_partitions(
+            conn,
+            table,
+            first.astimezone(_BERLIN).date(),
+            last.astimezone(_BERLIN).date(),
+        )
+
+    with driver_connection.cursor() as cursor:
+        cursor.execute(
+            sql.SQL("INSERT INTO {} ({}) SELECT {} FROM {}").format(
+                sql.Identifier(table.name), columns, columns, heap
+            )
+        )
+        log.info("Moved %d rows into partitioned %s.", cursor.rowcount, table.name)
+        cursor.execute(sql.SQL("DROP TABLE {}").format(heap))
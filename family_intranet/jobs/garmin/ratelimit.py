@@ -0,0 +1,96 @@
+"""Client-side rate limiting for Garmin Connect API calls."""
+
+import contextlib
+import threading
+import time
+from collections.abc import Generator
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    Tokens are refilled continuously at ``rate`` per second, up to ``capacity``.
+    Each call to :meth:`acquire` takes one token and blocks until one is free,
+    so bursts of up to ``capacity`` calls pass immediately and the sustained
+    throughput stays at ``rate`` calls per second.
+    """
+
+    def __init__(self, *, rate: float, capacity: int) -> None:
+        if rate <= 0 or capacity < 1:
+            msg = f"Invalid token bucket ({rate=}, {capacity=})."
+            raise ValueError(msg)
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated_at) * self._rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+class AdaptiveConcurrencyLimit:
+    """Thread-safe concurrency limit that adapts to throttling (AIMD).
+
+    At most ``limit`` callers hold a slot at once. Each successful call raises
+    the limit by ``1 / limit`` (about one per round of calls) up to ``maximum``;
+    a throttled call halves it, down to ``minimum``. Throttles within
+    ``cooldown`` seconds of the last decrease count as one, so a burst of 429s
+    from calls that were already in flight does not collapse the limit.
+    """
+
+    def __init__(
+        self, *, maximum: int, minimum: int = 1, cooldown: float = 1.0
+    ) -> None:
+        if minimum < 1 or maximum < minimum:
+            msg = f"Invalid concurrency limit ({minimum=}, {maximum=})."
+            raise ValueError(msg)
+        self._maximum = maximum
+        self._minimum = minimum
+        self._cooldown = cooldown
+        self._limit = float(maximum)
+        self._in_flight = 0
+        self._decreased_at = -cooldown
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @contextlib.contextmanager
+    def slot(self) -> Generator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < int(self._limit))
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify()
+
+    def on_success(self) -> None:
+        with self._condition:
+            previous = int(self._limit)
+            self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            if int(self._limit) > previous:
+                self._condition.notify()
+
+    def on_throttle(self) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if now - self._decreased_at < self._cooldown:
+                return
+            self._decreased_at = now
+            self._limit = max(self._minimum, self._limit / 2)
@@ -0,0 +1,111 @@
+"""Registry of the Garmin loaders.
+
+Each loader declares the API endpoints it reads, a parser that turns the
+responses of one day into rows, the models it writes and the loaders it depends
+on. The runner schedules registered loaders generically, so adding a dataset
+means registering one more :class:`LoaderSpec`. How rows are written (delta
+load, partitioning) is declared on the models' table ``info``.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Any
+
+from garminconnect import Garmin
+
+from family_intranet.otel import METRIC_PREFIX, get_meter
+
+if TYPE_CHECKING:
+    from family_intranet.jobs.garmin.batches import ColumnBatch
+    from family_intranet.jobs.garmin.db import Base
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("garmin")
+_loader_duration = _meter.create_histogram(
+    f"{METRIC_PREFIX}.garmin.loader.duration",
+    unit="s",
+    description="Duration of Garmin loader calls per day, by loader and phase",
+)
+
+Rows = tuple["Base | ColumnBatch", ...]
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """A ``Garmin`` client method called for one day.
+
+    Most endpoints take the day as ISO date; ``date_range`` endpoints take it
+    as ``start`` and ``end``.
+    """
+
+    method: str
+    date_range: bool = False
+
+    def fetch(self, garmin_client: Garmin, measure_date: date) -> Any:
+        day = measure_date.isoformat()
+        call = getattr(garmin_client, self.method)
+        return call(start=day, end=day) if self.date_range else call(day)
+
+
+@dataclass(frozen=True, kw_only=True)
+class LoaderSpec:
+    """One Garmin dataset: where it is fetched, how it is parsed and stored.
+
+    ``parse`` gets the responses keyed by endpoint method and the day.
+    """
+
+    name: str
+    endpoints: tuple[Endpoint, ...]
+    parse: Callable[..., Rows]
+    models: tuple[type["Base"], ...]
+    depends_on: tuple[str, ...] = ()
+
+    @property
+    def delta_load(self) -> bool:
+        """Whether any target table only takes points newer than the stored ones."""
+        return any(model.__table__.info.get("delta_load") for model in self.models)
+
+    def load(self, *, measure_date: date, garmin_client: Garmin) -> Rows:
+        """Fetch and parse the loader's rows for one day."""
+        logger.info("Loading %s for %s.", self.name, measure_date)
+        start = time.perf_counter()
+        responses = {
+            endpoint.method: endpoint.fetch(garmin_client, measure_date)
+            for endpoint in self.endpoints
+        }
+        fetched = time.perf_counter()
+        rows = self.parse(responses, measure_date=measure_date)
+        _loader_duration.record(
+            fetched - start, {"loader": self.name, "phase": "fetch"}
+        )
+        _loader_duration.record(
+            time.perf_counter() - fetched, {"loader": self.name, "phase": "parse"}
+        )
+        return rows
+
+
+LOADERS: dict[str, LoaderSpec] = {}
+
+
+def register(spec: LoaderSpec) -> LoaderSpec:
+    """Add a loader; its dependencies have to be registered before it.
+
+    Registration order is therefore always a valid execution order.
+    """
+    if spec.name in LOADERS:
+        msg = f"Garmin loader {spec.name} is already registered."
+        raise ValueError(msg)
+    if unknown := [name for name in spec.depends_on if name not in LOADERS]:
+        msg = f"Garmin loader {spec.name} depends on unregistered {unknown}."
+        raise ValueError(msg)
+    LOADERS[spec.name] = spec
+    return spec
+
+
+def in_order(names: tuple[str, ...]) -> Iterator[LoaderSpec]:
+    """The specs of the given loaders in registration (dependency) order."""
+    return (spec for name, spec in LOADERS.items() if name in names)
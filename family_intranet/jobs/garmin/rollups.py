@@ -0,0 +1,133 @@
+"""Per-minute and per-hour rollups of the Garmin time series.
+
+``garmin_rollup`` holds one row per resolution and bucket with the heart rate
+range and average, the summed steps, the average stress and the body battery
+range. Charts and queries over weeks of data read these buckets instead of the
+raw points. Rollups are recomputed per day after each load, so a day's buckets
+always reflect the raw rows stored for it.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+from family_intranet.jobs.garmin import db, models
+
+log = logging.getLogger(__name__)
+
+_BERLIN = ZoneInfo("Europe/Berlin")
+
+_ROLLUP = models.GarminRollup.__table__
+_VALUE_COLUMNS = tuple(
+    c.key for c in _ROLLUP.columns if c.key not in ("resolution", "bucket_start")
+)
+
+
+def _series_buckets(
+    resolution: models.RollupResolution,
+    tstamp: ColumnElement,
+    aggregates: dict[str, ColumnElement],
+    *,
+    start: datetime,
+    end: datetime,
+) -> Select:
+    """One series aggregated per bucket, NULL for the other rollup columns."""
+    bucket_start = func.date_trunc(resolution.value, tstamp)
+    return (
+        select(
+            bucket_start.label("bucket_start"),
+            *(
+                cast(aggregates.get(name, null()), _ROLLUP.c[name].type).label(name)
+                for name in _VALUE_COLUMNS
+            ),
+        )
+        .where(tstamp >= start, tstamp < end)
+        .group_by(bucket_start)
+    )
+
+
+def _rollup_query(
+    resolution: models.RollupResolution, *, start: datetime, end: datetime
+) -> Select:
+    heart_rate = models.HeartRate.__table__.c
+    steps = models.Steps.__table__.c
+    stress = models.Stress.__table__.c
+    body_battery = models.BodyBattery.__table__.c
+    buckets = union_all(
+        _series_buckets(
+            resolution,
+            heart_rate.tstamp,
+            {
+                "heart_rate_min": func.min(heart_rate.heart_rate),
+                "heart_rate_avg": func.avg(heart_rate.heart_rate),
+                "heart_rate_max": func.max(heart_rate.heart_rate),
+            },
+            start=start,
+            end=end,
+        ),
+        _series_buckets(
+            resolution,
+            steps.tstamp_start,
+            {"steps": func.sum(steps.steps)},
+            start=start,
+            end=end,
+        ),
+        _series_buckets(
+            resolution,
+            stress.tstamp,
+            # Negative levels mark periods without a measurement.
+            {
+                "stress_avg": func.avg(stress.stress_level).filter(
+                    stress.stress_level >= 0
+                )
+            },
+            start=start,
+            end=end,
+        ),
+        _series_buckets(
+            resolution,
+            body_battery.tstamp,
+            {
+                "body_battery_min": func.min(body_battery.body_battery_level),
+                "body_battery_max": func.max(body_battery.body_battery_level),
+            },
+            start=start,
+            end=end,
+        ),
+    ).subquery()
+    # Each series contributes at most one row per bucket, so max() merges them.
+    return select(
+        literal(resolution.value).label("resolution"),
+        buckets.c.bucket_start,
+        *(func.max(buckets.c[name]).label(name) for name in _VALUE_COLUMNS),
+    ).group_by(buckets.c.bucket_start)
+
+
+def update_rollups(session: Session, measure_dates: Iterable[date]) -> None:
+    """Recompute the minute and hour buckets of the given days."""
+    for measure_date in sorted(set(measure_dates)):
+        start = datetime.combine(measure_date, datetime.min.time(), tzinfo=_BERLIN)
+        end = datetime.combine(
+            measure_date + timedelta(days=1), datetime.min.time(), tzinfo=_BERLIN
+        )
+        for resolution in models.RollupResolution:
+            db.upsert_select(
+                session,
+                models.GarminRollup,
+                ("resolution", "bucket_start", *_VALUE_COLUMNS),
+                _rollup_query(resolution, start=start, end=end),
+            )
+        log.debug("Updated Garmin rollups for %s.", measure_date)
@@ -1,17 +1,46 @@
+import itertools
 import logging
+import multiprocessing
 import time
 import traceback
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
 from datetime import UTC, date, datetime
+from zoneinfo import ZoneInfo
 
+import django
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.tasks import task
+from garminconnect import Garmin
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from family_intranet.jobs.garmin import client, db, loaders, models
+from family_intranet.jobs.garmin import (
+    archive,
+    client,
+    db,
+    loaders,  # noqa: F401 (registers the loaders)
+    models,
+    partitions,
+    registry,
+    rollups,
+    schema,
+)
+from family_intranet.jobs.garmin.batches import row_count
+from family_intranet.jobs.garmin.ratelimit import AdaptiveConcurrencyLimit, TokenBucket
+from family_intranet.jobs.garmin.registry import LoaderSpec, Rows
 from family_intranet.otel import METRIC_PREFIX, get_meter
 
 logger = logging.getLogger(__name__)
 
+GARMIN_BACKFILL_QUEUE = "garmin_backfill"
+
 _meter = get_meter("garmin")
 _job_duration = _meter.create_histogram(
     f"{METRIC_PREFIX}.garmin.job.duration",
@@ -27,6 +56,310 @@ _loader_rows = _meter.create_counter(
     unit="rows",
     description="Rows saved per Garmin loader call",
 )
+_loader_failures = _meter.create_counter(
+    f"{METRIC_PREFIX}.garmin.loader.failures",
+    description="Garmin loader calls that failed for a day",
+)
+
+_BERLIN = ZoneInfo("Europe/Berlin")
+
+_LOADERS = registry.LOADERS
+
+
+class GarminLoadError(Exception):
+    """Raised after a load run in which at least one loader failed."""
+
+
+def _fetch(
+    spec: LoaderSpec,
+    *,
+    measure_date: date,
+    garmin_client: Garmin,
+    dependencies: dict[str, Future],
+) -> tuple[datetime, Rows]:
+    for name, dependency in dependencies.items():
+        if dependency.exception() is not None:
+            msg = f"Garmin loader {spec.name} depends on failed loader {name}."
+            raise RuntimeError(msg)
+    fetched_at = datetime.now(tz=UTC)
+    return fetched_at, spec.load(measure_date=measure_date, garmin_client=garmin_client)
+
+
+def _submit_day(
+    executor: ThreadPoolExecutor,
+    *,
+    measure_date: date,
+    loader_names: tuple[str, ...],
+    garmin_client: Garmin,
+) -> dict[str, Future[tuple[datetime, Rows]]]:
+    """Submit the day's loaders in dependency order.
+
+    Dependencies are submitted first, so by the time a loader waits for them
+    they are already running on another worker.
+    """
+    futures: dict[str, Future[tuple[datetime, Rows]]] = {}
+    for spec in registry.in_order(loader_names):
+        futures[spec.name] = executor.submit(
+            _fetch,
+            spec,
+            measure_date=measure_date,
+            garmin_client=garmin_client,
+            dependencies={
+                name: futures[name] for name in spec.depends_on if name in futures
+            },
+        )
+    return futures
+
+
+def _write_day(
+    measure_date: date,
+    futures: dict[str, Future[tuple[datetime, Rows]]],
+) -> list[str]:
+    """Write the rows and checkpoints of all loaders for one day in one transaction.
+
+    A failing loader only gets a failed checkpoint; the other loaders of the day
+    are still written. For today, delta-loaded series only write points newer
+    than the ones already stored. Returns the names of the failed loaders.
+    """
+    objects_by_loader: dict[str, Rows] = {}
+    checkpoints: list[models.GarminLoadCheckpoint] = []
+    for name, future in futures.items():
+        try:
+            fetched_at, objects = future.result()
+        except Exception as e:
+            logger.exception("Garmin loader %s failed for %s.", name, measure_date)
+            _loader_failures.add(1, {"loader": name})
+            checkpoints.append(
+                models.GarminLoadCheckpoint(
+                    loader=name,
+                    measure_date=measure_date,
+                    status=models.CheckpointStatus.FAILED,
+                    row_count=0,
+                    fetched_at=datetime.now(tz=UTC),
+                    error_message=repr(e),
+                )
+            )
+            continue
+        objects_by_loader[name] = objects
+        checkpoints.append(
+            models.GarminLoadCheckpoint(
+                loader=name,
+                measure_date=measure_date,
+                status=models.CheckpointStatus.SUCCESS,
+                row_count=row_count(objects),
+                fetched_at=fetched_at,
+            )
+        )
+
+    with Session(db.get_engine()) as session, session.begin():
+        if settings.GARMIN_DELTA_LOAD and measure_date == date.today():
+            day_start = datetime.combine(
+                measure_date, datetime.min.time(), tzinfo=_BERLIN
+            )
+            objects_by_loader = {
+                name: db.drop_stored_points(
+                    session,
+                    objects,
+                    start=day_start,
+                    end=day_start + relativedelta(days=1),
+                )
+                if _LOADERS[name].delta_load
+                else objects
+                for name, objects in objects_by_loader.items()
+            }
+        db.upsert_objects(
+            itertools.chain(*objects_by_loader.values(), checkpoints),
+            session=session,
+        )
+    for name, objects in objects_by_loader.items():
+        _loader_rows.add(row_count(objects), {"loader": name})
+    return [name for name in futures if name not in objects_by_loader]
+
+
+def _is_stale(checkpoint: models.GarminLoadCheckpoint) -> bool:
+    """Data fetched before its day was over may still be incomplete."""
+    fetched_on = checkpoint.fetched_at.astimezone(_BERLIN).date()
+    return fetched_on <= checkpoint.measure_date
+
+
+def _plan_loads(start_date: date, end_date: date) -> dict[date, tuple[str, ...]]:
+    """Loaders to run per day: those without a fresh successful checkpoint."""
+    with Session(db.get_engine()) as session:
+        done = {
+            (checkpoint.loader, checkpoint.measure_date)
+            for checkpoint in session.scalars(
+                select(models.GarminLoadCheckpoint).where(
+                    models.GarminLoadCheckpoint.measure_date.between(
+                        start_date, end_date
+                    ),
+                    models.GarminLoadCheckpoint.status
+                    == models.CheckpointStatus.SUCCESS,
+                )
+            )
+            if not _is_stale(checkpoint)
+        }
+
+    plan = {}
+    for day_offset in range((end_date - start_date).days + 1):
+        measure_date = start_date + relativedelta(days=day_offset)
+        loader_names = tuple(
+            name for name in _LOADERS if (name, measure_date) not in done
+        )
+        if loader_names:
+            plan[measure_date] = loader_names
+    logger.info(
+        "Garmin load plan: %d loader runs over %d days (%d up to date).",
+        sum(len(names) for names in plan.values()),
+        len(plan),
+        len(done),
+    )
+    return plan
+
+
+def _load_days(
+    plan: dict[date, tuple[str, ...]], *, garmin_client: client.CachingGarmin
+) -> list[str]:
+    """Fetch days concurrently and write them one after another, in date order.
+
+    Loader calls for up to ``GARMIN_LOAD_MAX_WORKERS`` days are in flight at
+    once; only the calling thread writes to the datastore. Returns the failed
+    loader runs as ``loader@date``.
+    """
+    max_workers = settings.GARMIN_LOAD_MAX_WORKERS
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit(measure_date: date, loader_names: tuple[str, ...]):
+        return measure_date, _submit_day(
+            executor,
+            measure_date=measure_date,
+            loader_names=loader_names,
+            garmin_client=garmin_client,
+        )
+
+    failed = []
+    try:
+        remaining = iter(plan.items())
+        pending = deque(
+            itertools.starmap(submit, itertools.islice(remaining, max_workers))
+        )
+        while pending:
+            measure_date, futures = pending.popleft()
+            failed.extend(
+                f"{name}@{measure_date}" for name in _write_day(measure_date, futures)
+            )
+            garmin_client.forget(measure_date.isoformat())
+            if (next_day := next(remaining, None)) is not None:
+                pending.append(submit(*next_day))
+    finally:
+        executor.shutdown(cancel_futures=True)
+    return failed
+
+
+def _build_garmin_client() -> client.CachingGarmin:
+    # The limiters are per process, so each of the worker processes calling
+    # Garmin gets its share of the configured limits.
+    processes = settings.GARMIN_API_PROCESSES
+    fetching_client = client.RetryingGarmin(
+        client.RateLimitedGarmin(
+            client.get_garmin_client(),
+            TokenBucket(
+                rate=settings.GARMIN_API_RATE_LIMIT / processes,
+                capacity=max(settings.GARMIN_API_BURST // processes, 1),
+            ),
+        ),
+        AdaptiveConcurrencyLimit(
+            maximum=max(settings.GARMIN_LOAD_MAX_WORKERS // processes, 1)
+        ),
+        max_retries=settings.GARMIN_API_MAX_RETRIES,
+        base_delay=settings.GARMIN_API_RETRY_BASE_DELAY,
+        max_delay=settings.GARMIN_API_RETRY_MAX_DELAY,
+    )
+    if (garmin_archive := archive.GarminArchive.from_settings()) is not None:
+        fetching_client = archive.ArchivingGarmin(fetching_client, garmin_archive)
+    return client.CachingGarmin(fetching_client)
+
+
+def _load_range(start_date: date, end_date: date) -> None:
+    """Load start to end date (inclusive) from the Garmin API.
+
+    Only loader runs without a fresh successful checkpoint are fetched; the
+    rollups of all fetched days are recomputed afterwards. Raises
+    ``GarminLoadError`` if any of them failed; the others are saved regardless.
+    """
+    plan = _plan_loads(start_date, end_date)
+    if not plan:
+        return
+
+    partitions.ensure_partitions(db.get_engine(), min(plan), max(plan))
+    garmin_client = _build_garmin_client()
+    failed = _load_days(plan, garmin_client=garmin_client)
+    logger.info(
+        "Garmin response cache: %d hits, %d misses.",
+        garmin_client.hits,
+        garmin_client.misses,
+    )
+    with Session(db.get_engine()) as session, session.begin():
+        rollups.update_rollups(session, plan)
+    if failed:
+        msg = f"{len(failed)} Garmin loader runs failed: {', '.join(failed)}"
+        raise GarminLoadError(msg)
+
+
+def _replay_day(measure_date: date) -> int:
+    """Rebuild one day from the raw-payload archive. Returns the rows written."""
+    archived_client = archive.ArchivedGarmin(archive.GarminArchive.from_settings())
+    objects_by_loader = {
+        name: spec.load(measure_date=measure_date, garmin_client=archived_client)
+        for name, spec in _LOADERS.items()
+    }
+    with Session(db.get_engine()) as session, session.begin():
+        rows = db.upsert_objects(
+            itertools.chain.from_iterable(objects_by_loader.values()),
+            session=session,
+        )
+        rollups.update_rollups(session, (measure_date,))
+    return rows
+
+
+def replay_archive(start_date: date, end_date: date, *, workers: int) -> int:
+    """Rebuild all tables for archived days between start and end, offline.
+
+    Days are parsed and written in parallel worker processes; days with
+    incomplete archives are skipped. Returns the number of days replayed.
+    """
+    garmin_archive = archive.GarminArchive.from_settings()
+    if garmin_archive is None:
+        msg = "Garmin archive is disabled (GARMIN_ARCHIVE_PATH is empty)."
+        raise RuntimeError(msg)
+
+    measure_dates = [d for d in garmin_archive.dates() if start_date <= d <= end_date]
+    logger.info("Replaying %d archived days.", len(measure_dates))
+    if not measure_dates:
+        return 0
+
+    schema.ensure_schema(db.get_engine())
+    partitions.ensure_partitions(db.get_engine(), measure_dates[0], measure_dates[-1])
+    replayed = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        futures = {
+            executor.submit(_replay_day, measure_date): measure_date
+            for measure_date in measure_dates
+        }
+        for future in as_completed(futures):
+            try:
+                rows = future.result()
+            except FileNotFoundError as e:
+                logger.warning(
+                    "Skipping %s, archive incomplete: %s", futures[future], e
+                )
+                continue
+            logger.info("Replayed %s (%d rows).", futures[future], rows)
+            replayed += 1
+    return replayed
 
 
 def _get_last_successful_run_date() -> date:
@@ -54,8 +387,7 @@ def run_garmin_load() -> None:
     """Hourly scheduled job: loads all Garmin data since last successful run."""
     started_at = datetime.now(tz=UTC)
 
-    # Ensure tables exist
-    db.Base.metadata.create_all(db.get_engine())
+    schema.ensure_schema(db.get_engine())
 
     start_date = _get_last_successful_run_date()
     logger.info("Starting Garmin load for %s.", start_date)
@@ -71,51 +403,7 @@ def run_garmin_load() -> None:
 
     job_start = time.perf_counter()
     try:
-        garmin_client = client.get_garmin_client()
-        for day_offset in range((end_date - start_date).days + 1):
-            measure_date = start_date + relativedelta(days=day_offset)
-            _loader_rows.add(
-                loaders.get_heartrate_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "heartrate"},
-            )
-            _loader_rows.add(
-                loaders.get_steps_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "steps"},
-            )
-            _loader_rows.add(
-                loaders.get_daily_steps_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "daily_steps"},
-            )
-            _loader_rows.add(
-                loaders.get_floors_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "floors"},
-            )
-            _loader_rows.add(
-                loaders.get_stress_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "stress"},
-            )
-            _loader_rows.add(
-                loaders.get_body_battery_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "body_battery"},
-            )
-            _loader_rows.add(
-                loaders.get_sleep_data(
-                    measure_date=measure_date, garmin_client=garmin_client
-                ),
-                {"loader": "sleep"},
-            )
+        _load_range(start_date, end_date)
 
         run_record.success = True
         run_record.finished_at = datetime.now(tz=UTC)
@@ -132,3 +420,24 @@ def run_garmin_load() -> None:
         _job_runs.add(1, {"status": "failed"})
         _job_duration.record(time.perf_counter() - job_start)
         raise
+
+
+@task(queue_name=GARMIN_BACKFILL_QUEUE)
+def run_garmin_backfill(start_date: str, end_date: str) -> None:
+    """Backfill one slice (ISO dates, inclusive) of a historical Garmin load.
+
+    Enqueued per day or week by the ``backfill_garmin`` command, so a large
+    backfill is resumable and can be spread over several workers. Slices do not
+    record a ``GarminLoadRun``, leaving the hourly job's start date untouched.
+    """
+    schema.ensure_schema(db.get_engine())
+    logger.info("Garmin backfill: %s to %s", start_date, end_date)
+    job_start = time.perf_counter()
+    try:
+        _load_range(date.fromisoformat(start_date), date.fromisoformat(end_date))
+    except Exception:
+        _job_runs.add(1, {"status": "failed", "job": "backfill"})
+        raise
+    finally:
+        _job_duration.record(time.perf_counter() - job_start, {"job": "backfill"})
+    _job_runs.add(1, {"status": "success", "job": "backfill"})
@@ -0,0 +1,118 @@
+"""Versioned bootstrap of the Garmin datastore schema.
+
+The DDL of all models is hashed and the hash recorded in
+``garmin_schema_version`` once the schema has been applied. Runs whose models
+match a recorded hash skip catalog introspection entirely and only pay for one
+lookup. When the models change, missing tables are created and additive
+changes (new columns and indexes) are applied to existing tables in place.
+Anything else, like changed types or dropped columns, still needs a manual
+migration.
+"""
+
+import functools
+import hashlib
+import logging
+from datetime import UTC, datetime
+
+from psycopg import sql
+from sqlalchemy import Connection, Engine, Table, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from family_intranet.jobs.garmin import models, partitions
+from family_intranet.jobs.garmin.db import Base
+
+log = logging.getLogger(__name__)
+
+# Serialises schema changes between concurrent runs (e.g. backfill workers).
+_LOCK_KEY = "garmin_schema"
+
+_VERSION = models.GarminSchemaVersion.__table__
+
+
+@functools.cache
+def schema_hash() -> str:
+    """SHA-256 of the PostgreSQL DDL of all tables and indexes of the models."""
+    dialect = postgresql.dialect()
+    digest = hashlib.sha256()
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()
+
+
+def _is_applied(conn: Connection, current: str) -> bool:
+    if conn.scalar(text("SELECT to_regclass(:name)"), {"name": _VERSION.name}) is None:
+        return False
+    return (
+        conn.scalar(_VERSION.select().where(_VERSION.c.schema_hash == current))
+        is not None
+    )
+
+
+def _add_missing_columns(conn: Connection, table: Table, existing: set[str]) -> None:
+    driver_connection = conn.connection.driver_connection
+    with driver_connection.cursor() as cursor:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                log.warning(
+                    "Adding NOT NULL column %s.%s as nullable (no server default).",
+                    table.name,
+                    column.name,
+                )
+            log.info("Adding column %s.%s.", table.name, column.name)
+            cursor.execute(
+                sql.SQL("ALTER TABLE {} ADD COLUMN IF NOT EXISTS {} {}").format(
+                    sql.Identifier(table.name),
+                    sql.Identifier(column.name),
+                    sql.SQL(column.type.compile(dialect=conn.dialect)),
+                )
+            )
+
+
+def _apply_additive_changes(conn: Connection) -> None:
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    pending_conversion = partitions.heap_table_names(conn)
+    Base.metadata.create_all(conn)
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        _add_missing_columns(
+            conn, table, {c["name"] for c in inspector.get_columns(table.name)}
+        )
+        if table.name in pending_conversion:
+            # The partitioned table gets its indexes when it replaces the heap.
+            continue
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Bring the datastore up to the models, unless it already is."""
+    current = schema_hash()
+    with engine.connect() as conn:
+        if _is_applied(conn, current):
+            log.debug("Garmin schema %s is up to date.", current[:12])
+            return
+
+    log.info("Applying Garmin schema %s.", current[:12])
+    with engine.begin() as conn:
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": _LOCK_KEY}
+        )
+        if _is_applied(conn, current):
+            return
+        _apply_additive_changes(conn)
+    partitions.convert_heap_tables(engine)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(_VERSION)
+            .values(schema_hash=current, applied_at=datetime.now(tz=UTC))
+            .on_conflict_do_nothing()
+        )
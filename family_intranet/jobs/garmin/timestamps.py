@@ -0,0 +1,71 @@
+"""Batch conversion of Garmin timestamps to aware Europe/Berlin datetimes.
+
+Garmin series carry either epoch milliseconds or unaware UTC ISO strings. Instead
+of resolving the Europe/Berlin zone for every point, the UTC offset is looked up
+once per UTC hour (DST transitions happen on full UTC hours) and each point is
+converted with a fixed-offset ``timezone``.
+"""
+
+import functools
+from array import array
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+_MILLIS_PER_HOUR = 3_600_000
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MILLISECOND = timedelta(milliseconds=1)
+
+
+@functools.lru_cache(maxsize=4096)
+def _berlin_offset_at_hour(epoch_hour: int) -> timezone:
+    utc = datetime.fromtimestamp(epoch_hour * 3600, UTC)
+    return timezone(utc.astimezone(BERLIN).utcoffset())
+
+
+@functools.lru_cache(maxsize=4096)
+def _berlin_offset_at_iso_hour(iso_hour: str) -> timezone:
+    utc = datetime.fromisoformat(iso_hour).replace(tzinfo=UTC)
+    return timezone(utc.astimezone(BERLIN).utcoffset())
+
+
+def millis_to_berlin(values: Iterable[int | None]) -> list[datetime | None]:
+    """Convert epoch milliseconds to aware Europe/Berlin datetimes; keeps ``None``."""
+    return [
+        None
+        if millis is None
+        else datetime.fromtimestamp(
+            millis / 1000, _berlin_offset_at_hour(millis // _MILLIS_PER_HOUR)
+        )
+        for millis in values
+    ]
+
+
+def utc_strings_to_berlin(values: Iterable[str]) -> list[datetime]:
+    """Convert unaware UTC ISO strings (``YYYY-MM-DDTHH:MM:SS[.f]``) to Berlin time."""
+    converted = []
+    for value in values:
+        tz = _berlin_offset_at_iso_hour(value[:13])
+        converted.append(
+            (datetime.fromisoformat(value) + tz.utcoffset(None)).replace(tzinfo=tz)
+        )
+    return converted
+
+
+def epoch_millis(tstamp: datetime) -> int:
+    """Exact epoch milliseconds of an aware datetime."""
+    return (tstamp - _EPOCH) // _MILLISECOND
+
+
+def utc_strings_to_millis(values: Iterable[str]) -> array:
+    """Convert unaware UTC ISO strings to an ``array("q")`` of epoch milliseconds."""
+    naive_epoch = _EPOCH.replace(tzinfo=None)
+    return array(
+        "q",
+        (
+            (datetime.fromisoformat(value) - naive_epoch) // _MILLISECOND
+            for value in values
+        ),
+    )
@@ -0,0 +1,114 @@
+"""Scheduled refreshes of the repository cache.
+
+Each refresh calls the repositories behind one dashboard panel, with the same
+arguments as its view, inside ``cache.refreshing()``. The fresh values land in
+the shared repository cache, so the views only read it and page loads do not
+wait for the upstream sites. Intervals are a bit shorter than the repositories'
+cache ttl, so entries are refreshed before they go stale.
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from django.tasks import task
+
+from family_intranet.otel import METRIC_PREFIX, get_meter
+from family_intranet.repositories.cache import refreshing
+from family_intranet.repositories.fussballde import (
+    get_erik_e2_junioren_next_games,
+    get_speldorf_next_home_games,
+)
+from family_intranet.repositories.gymbroich import (
+    get_vertretungsplan,
+    get_vertretungsplan_dates,
+)
+from family_intranet.repositories.handballnordrhein import (
+    get_djk_saarn_d_jugend,
+    get_djk_saarn_erste_herren,
+)
+from family_intranet.repositories.mheg import (
+    get_muelltermine_for_home,
+    get_wertstoffhof_oeffnungszeiten,
+)
+from family_intranet.repositories.outlook_calendar import fetch_work_calendar
+from family_intranet.repositories.owm import get_weather_data_muelheim
+from family_intranet.settings import OUTLOOK_CALENDAR_URL
+
+logger = logging.getLogger(__name__)
+
+_meter = get_meter("refresh")
+_refresh_runs = _meter.create_counter(
+    f"{METRIC_PREFIX}.refresh.runs",
+    description="Scheduled repository cache refreshes, by panel and status",
+)
+_refresh_duration = _meter.create_histogram(
+    f"{METRIC_PREFIX}.refresh.duration",
+    unit="s",
+    description="Duration of scheduled repository cache refreshes",
+)
+
+
+@dataclass(frozen=True, kw_only=True)
+class Refresh:
+    interval_minutes: int
+    refresh: Callable[[], None]
+
+
+def _refresh_weather() -> None:
+    _, error = get_weather_data_muelheim()
+    if error:
+        raise RuntimeError(error)
+
+
+def _refresh_vertretungsplan() -> None:
+    for vertretungsplan_date in get_vertretungsplan_dates():
+        get_vertretungsplan(vertretungsplan_date)
+
+
+def _refresh_muelltermine() -> None:
+    get_muelltermine_for_home()
+    get_wertstoffhof_oeffnungszeiten()
+
+
+def _refresh_handball() -> None:
+    get_djk_saarn_d_jugend()
+    get_djk_saarn_erste_herren()
+
+
+def _refresh_football() -> None:
+    get_erik_e2_junioren_next_games()
+    get_speldorf_next_home_games()
+
+
+def _refresh_work_calendar() -> None:
+    if OUTLOOK_CALENDAR_URL:
+        fetch_work_calendar(OUTLOOK_CALENDAR_URL, days_ahead=7)
+
+
+REFRESHES: dict[str, Refresh] = {
+    "weather": Refresh(interval_minutes=8, refresh=_refresh_weather),
+    "vertretungsplan": Refresh(interval_minutes=4, refresh=_refresh_vertretungsplan),
+    "muelltermine": Refresh(interval_minutes=50, refresh=_refresh_muelltermine),
+    "handball": Refresh(interval_minutes=25, refresh=_refresh_handball),
+    "football": Refresh(interval_minutes=25, refresh=_refresh_football),
+    "work_calendar": Refresh(interval_minutes=8, refresh=_refresh_work_calendar),
+}
+
+
+@task
+def refresh_repository_cache(name: str) -> None:
+    """Refresh the cached repository data of one dashboard panel."""
+    start = time.perf_counter()
+    try:
+        with refreshing():
+            REFRESHES[name].refresh()
+    except Exception:
+        _refresh_runs.add(1, {"panel": name, "status": "failure"})
+        logger.exception("Refreshing %s failed, keeping the cached data.", name)
+        raise
+    finally:
+        _refresh_duration.record(time.perf_counter() - start, {"panel": name})
+    _refresh_runs.add(1, {"panel": name, "status": "success"})
+    logger.info("Refreshed %s.", name)
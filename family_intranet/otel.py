@@ -2,7 +2,8 @@ import contextlib
 import logging
 import os
 import time
-from collections.abc import Generator
+from collections.abc import Callable, Generator, Iterable
+from typing import Protocol
 
 from opentelemetry import metrics
 from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
@@ -22,6 +23,18 @@ METRIC_PREFIX = os.environ.get("OTEL_SERVICE_NAME", _DEFAULT_SERVICE_NAME)
 _repository_duration: metrics.Histogram | None = None
 
 
+class ConnectionPool(Protocol):
+    """The subset of SQLAlchemy's ``QueuePool`` that is exported as metrics."""
+
+    def size(self) -> int: ...
+
+    def checkedin(self) -> int: ...
+
+    def checkedout(self) -> int: ...
+
+    def overflow(self) -> int: ...
+
+
 def setup_otel(*, instrument_django: bool = True) -> None:
     """Initialize OTEL MeterProvider. Call once at process startup."""
     global _repository_duration  # noqa: PLW0603
@@ -70,3 +83,32 @@ def timed_repository_call(repository_name: str) -> Generator[None]:
             _repository_duration.record(
                 time.perf_counter() - start, {"repository": repository_name}
             )
+
+
+def observe_connection_pool(pool: ConnectionPool, pool_name: str) -> None:
+    """Export connection pool usage as observable gauges, read on each collection."""
+    meter = get_meter("db_pool")
+    attributes = {"pool": pool_name}
+
+    def callback(
+        read: Callable[[], int],
+    ) -> Callable[[metrics.CallbackOptions], Iterable[metrics.Observation]]:
+        def observe(
+            _options: metrics.CallbackOptions,
+        ) -> Iterable[metrics.Observation]:
+            return [metrics.Observation(read(), attributes)]
+
+        return observe
+
+    for name, read, description in (
+        ("size", pool.size, "Configured connection pool size"),
+        ("checked_in", pool.checkedin, "Idle connections in the pool"),
+        ("checked_out", pool.checkedout, "Connections currently in use"),
+        ("overflow", pool.overflow, "Connections opened beyond the pool size"),
+    ):
+        meter.create_observable_gauge(
+            f"{METRIC_PREFIX}.db.pool.{name}",
+            callbacks=[callback(read)],
+            unit="connections",
+            description=description,
+        )
@@ -0,0 +1,277 @@
+"""Cache for repository results shared by all processes.
+
+Results are stored in the Django cache ``repository`` instead of per-process
+dicts, so the web server and the task worker read the same warm entries and a
+restart does not empty them. By default the cache is Django's database cache
+in the existing PostgreSQL database (table ``repository_cache``, created by
+``manage.py createcachetable``); ``REPOSITORY_CACHE_BACKEND`` and
+``REPOSITORY_CACHE_LOCATION`` switch it to e.g. the file-based cache.
+
+Misses are single-flight: concurrent callers of the same key in a process wait
+for the first one, and processes take turns through a PostgreSQL advisory lock
+on the key, so an expired entry causes one upstream request, not one per panel.
+"""
+
+import contextlib
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections.abc import Callable, Generator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from django.core.cache import BaseCache, caches
+from django.db import DatabaseError, close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "repository"
+
+_MISSING = object()
+
+# Background refreshes of stale entries, at most one per key and process.
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="repository-refresh"
+)
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+
+# In-flight misses of this process, by key.
+_flights: dict[str, Future] = {}
+_flights_lock = threading.Lock()
+
+# Set within ``refreshing()``: cached functions fetch instead of reading.
+_local = threading.local()
+
+# Seconds a miss waits for another process fetching the same key before it
+# fetches itself, and the polling interval of that wait.
+_LOCK_TIMEOUT = 30.0
+_LOCK_POLL_INTERVAL = 0.1
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """A stale-while-revalidate value, fresh until and kept until (epoch secs)."""
+
+    value: Any
+    fresh_until: float
+    expires_at: float
+
+
+def cache_key(func: Callable, args: tuple, kwargs: dict[str, Any]) -> str:
+    """Key of a call: the function's qualified name and a hash of its arguments."""
+    # Callable objects other than functions are keyed by their class.
+    name = getattr(func, "__qualname__", type(func).__qualname__)
+    arguments = repr((args, sorted(kwargs.items()))).encode()
+    return f"{func.__module__}.{name}:{hashlib.sha256(arguments).hexdigest()[:16]}"
+
+
+def _get(cache: BaseCache, key: str) -> Any:
+    try:
+        return cache.get(key, _MISSING)
+    except Exception:
+        logger.warning("Repository cache read failed for %s.", key, exc_info=True)
+        return _MISSING
+
+
+def _set(cache: BaseCache, key: str, value: Any, *, timeout: int) -> None:
+    try:
+        cache.set(key, value, timeout=timeout)
+    except Exception:
+        logger.warning("Repository cache write failed for %s.", key, exc_info=True)
+
+
+def _try_advisory_lock(key: str, *, timeout: float) -> bool | None:
+    """Take the advisory lock on ``key``; None if locking is unavailable."""
+    if connection.vendor != "postgresql":
+        return None
+    deadline = time.monotonic() + timeout
+    try:
+        with connection.cursor() as cursor:
+            while True:
+                cursor.execute("SELECT pg_try_advisory_lock(hashtext(%s))", [key])
+                if cursor.fetchone()[0]:
+                    return True
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(_LOCK_POLL_INTERVAL)
+    except DatabaseError:
+        logger.warning("Advisory lock on %s failed.", key, exc_info=True)
+        return None
+
+
+@contextlib.contextmanager
+def _cross_process_lock(key: str, *, timeout: float) -> Generator[bool]:
+    """Hold the PostgreSQL advisory lock on ``key`` while fetching it.
+
+    Yields False if another process still held the lock after ``timeout``
+    seconds. Without PostgreSQL (or if it fails) it yields True unlocked.
+    """
+    locked = _try_advisory_lock(key, timeout=timeout)
+    try:
+        yield locked is not False
+    finally:
+        if locked:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_unlock(hashtext(%s))", [key])
+            except DatabaseError:
+                logger.warning("Advisory unlock of %s failed.", key, exc_info=True)
+
+
+def _single_flight(key: str, load: Callable[[], Any]) -> Any:
+    """Run ``load`` for ``key`` once at a time across threads and processes.
+
+    Threads of this process arriving while a load is in flight get its result;
+    other processes wait for the advisory lock. ``load`` should re-check the
+    cache, as the previous holder of the lock has usually just filled it.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[key] = Future()
+    if not is_leader:
+        return flight.result()
+
+    try:
+        with _cross_process_lock(key, timeout=_LOCK_TIMEOUT):
+            value = load()
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(value)
+        return value
+    finally:
+        with _flights_lock:
+            del _flights[key]
+
+
+def _fetch_entry(
+    func: Callable, args: tuple, kwargs: dict[str, Any], *, ttl: int, hard_ttl: int
+) -> _Entry:
+    value = func(*args, **kwargs)
+    now = time.time()
+    return _Entry(value, now + ttl, now + hard_ttl)
+
+
+def _set_entry(cache: BaseCache, key: str, entry: _Entry) -> None:
+    _set(cache, key, entry, timeout=max(int(entry.expires_at - time.time()), 1))
+
+
+def _refresh(key: str, stale: _Entry, fetch: Callable[[], _Entry], *, ttl: int) -> None:
+    cache = caches[CACHE_ALIAS]
+    try:
+        with _cross_process_lock(key, timeout=0) as locked:
+            current = _get(cache, key)
+            if not locked or (
+                isinstance(current, _Entry) and current.fresh_until > time.time()
+            ):
+                # Another process is refreshing or has just refreshed it.
+                return
+            entry = fetch()
+        _set_entry(cache, key, entry)
+        logger.debug("Refreshed %s in the background.", key)
+    except Exception:
+        logger.warning(
+            "Refreshing %s failed, serving the stale value.", key, exc_info=True
+        )
+        # Try again after another ttl instead of on every call.
+        _set_entry(
+            cache,
+            key,
+            _Entry(stale.value, time.time() + ttl, stale.expires_at),
+        )
+        return
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        close_old_connections()
+
+
+def _schedule_refresh(
+    key: str, stale: _Entry, fetch: Callable[[], _Entry], *, ttl: int
+) -> None:
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    _refresh_executor.submit(_refresh, key, stale, fetch, ttl=ttl)
+
+
+@contextlib.contextmanager
+def refreshing() -> Generator[None]:
+    """Make cached functions of this thread fetch and store fresh values.
+
+    Used by the scheduled refreshes; outside the block the cache is read.
+    """
+    previous = getattr(_local, "refreshing", False)
+    _local.refreshing = True
+    try:
+        yield
+    finally:
+        _local.refreshing = previous
+
+
+def cached(*, ttl: int, hard_ttl: int | None = None) -> Callable[[Callable], Callable]:
+    """Cache a repository function's results for ``ttl`` seconds per arguments.
+
+    With ``hard_ttl``, results are kept up to ``hard_ttl`` seconds and served
+    stale after ``ttl`` while a background thread fetches a fresh value; if the
+    upstream fails, the last good value keeps being served until ``hard_ttl``.
+    Only callers without any cached value wait for the upstream.
+
+    Arguments are keyed by ``repr``, results must be picklable. If the cache
+    itself fails (e.g. the database is down), the function is called directly.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            cache = caches[CACHE_ALIAS]
+            key = cache_key(func, args, kwargs)
+            if getattr(_local, "refreshing", False):
+                if hard_ttl is None:
+                    value = func(*args, **kwargs)
+                    _set(cache, key, value, timeout=ttl)
+                    return value
+                entry = _fetch_entry(func, args, kwargs, ttl=ttl, hard_ttl=hard_ttl)
+                _set_entry(cache, key, entry)
+                return entry.value
+
+            value = _get(cache, key)
+            if hard_ttl is None:
+
+                def load() -> Any:
+                    value = _get(cache, key)
+                    if value is _MISSING:
+                        value = func(*args, **kwargs)
+                        _set(cache, key, value, timeout=ttl)
+                    return value
+
+                return value if value is not _MISSING else _single_flight(key, load)
+
+            fetch = functools.partial(
+                _fetch_entry, func, args, kwargs, ttl=ttl, hard_ttl=hard_ttl
+            )
+
+            def load_entry() -> _Entry:
+                entry = _get(cache, key)
+                if not isinstance(entry, _Entry):
+                    entry = fetch()
+                    _set_entry(cache, key, entry)
+                return entry
+
+            if not isinstance(value, _Entry):
+                return _single_flight(key, load_entry).value
+            if value.fresh_until <= time.time():
+                _schedule_refresh(key, value, fetch, ttl=ttl)
+            return value.value
+
+        return wrapper
+
+    return decorator
@@ -3,6 +3,8 @@ from datetime import datetime
 import requests
 from bs4 import BeautifulSoup
 
+from family_intranet.repositories.cache import cached
+
 # https://www.fussball.de/ajax.team.matchplan/-/mime-type/JSON/mode/PAGE/prev-season-allowed/false/show-filter/false/team-id/011MIFBNQS000000VTVG0001VTR8C1K7/max/10/datum-von/2025-09-01/datum-bis/2026-06-30/offset/0
 
 
@@ -47,6 +49,7 @@ def get_vfb_speldorf_home_url() -> str:
     return "https://www.fussball.de/verein/vfb-speldorf-niederrhein/-/id/00ES8GN8VS000030VV0AG08LVUPGND5I#!/"
 
 
+@cached(ttl=1_800, hard_ttl=86_400)  # 30 minutes, stale up to 1 day
 def get_erik_e2_junioren_next_games() -> list[dict]:
     r = requests.get(
         "https://www.fussball.de/ajax.team.next.games/-/mode/PAGE/team-id/011MIFBNQS000000VTVG0001VTR8C1K7",
@@ -56,6 +59,7 @@ def get_erik_e2_junioren_next_games() -> list[dict]:
     return _parse_next_games(r.text)
 
 
+@cached(ttl=1_800, hard_ttl=86_400)  # 30 minutes, stale up to 1 day
 def get_speldorf_next_home_games() -> list[dict]:
     r = requests.get(
         "https://www.fussball.de/ajax.club.next.games/-/id/00ES8GN8VS000030VV0AG08LVUPGND5I/",
@@ -0,0 +1,186 @@
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, ColumnElement, func, select
+from sqlalchemy.orm import Session
+
+from family_intranet.jobs.garmin import db, models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POINT_BUDGET = 500
+MAX_POINT_BUDGET = 5_000
+MAX_DAYS = 365
+# Longer ranges are read from the hourly rollups instead of the raw points.
+ROLLUP_AFTER_DAYS = 7
+
+Point = tuple[int, float]
+
+
+class GarminSeries(BaseModel):
+    name: str
+    label: str
+    unit: str
+    points: list[Point]
+    raw_point_count: int
+
+
+_ROLLUP = models.GarminRollup.__table__.c
+
+
+@dataclass(frozen=True, kw_only=True)
+class _SeriesSpec:
+    label: str
+    unit: str
+    tstamp: ColumnElement
+    value: ColumnElement
+    # Column of ``garmin_rollup`` for long ranges; None reads the raw points.
+    rollup: ColumnElement | None = None
+
+
+GARMIN_SERIES: dict[str, _SeriesSpec] = {
+    "heart_rate": _SeriesSpec(
+        label="Herzfrequenz",
+        unit="bpm",
+        tstamp=models.HeartRate.__table__.c.tstamp,
+        value=models.HeartRate.__table__.c.heart_rate,
+        rollup=_ROLLUP.heart_rate_avg,
+    ),
+    "stress": _SeriesSpec(
+        label="Stress",
+        unit="",
+        tstamp=models.Stress.__table__.c.tstamp,
+        value=models.Stress.__table__.c.stress_level,
+        rollup=_ROLLUP.stress_avg,
+    ),
+    "body_battery": _SeriesSpec(
+        label="Body Battery",
+        unit="%",
+        tstamp=models.BodyBattery.__table__.c.tstamp,
+        value=models.BodyBattery.__table__.c.body_battery_level,
+        rollup=(_ROLLUP.body_battery_min + _ROLLUP.body_battery_max) / 2,
+    ),
+    "sleep_heart_rate": _SeriesSpec(
+        label="Herzfrequenz im Schlaf",
+        unit="bpm",
+        tstamp=models.SleepHeartRate.__table__.c.tstamp,
+        value=models.SleepHeartRate.__table__.c.heart_rate,
+    ),
+    "sleep_stress": _SeriesSpec(
+        label="Stress im Schlaf",
+        unit="",
+        tstamp=models.SleepStress.__table__.c.tstamp,
+        value=models.SleepStress.__table__.c.stress_level,
+    ),
+    "sleep_body_battery": _SeriesSpec(
+        label="Body Battery im Schlaf",
+        unit="%",
+        tstamp=models.SleepBodyBattery.__table__.c.tstamp,
+        value=models.SleepBodyBattery.__table__.c.body_battery_level,
+    ),
+}
+
+
+def lttb(points: Sequence[Point], threshold: int) -> list[Point]:
+    """Downsample to ``threshold`` points with Largest-Triangle-Three-Buckets.
+
+    Keeps the first and last point; from each bucket in between, the point
+    spanning the largest triangle with the previously kept point and the
+    average of the next bucket is kept, which preserves peaks and dips.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:  # noqa: PLR2004
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        ax, ay = points[a]
+        max_area = -1.0
+        for j in range(int(i * bucket_size) + 1, next_start):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                a = j
+        sampled.append(points[a])
+    sampled.append(points[-1])
+    return sampled
+
+
+def _epoch_millis(tstamp: ColumnElement) -> ColumnElement:
+    return (func.extract("epoch", tstamp) * 1000).cast(BigInteger)
+
+
+def _get_points(spec: _SeriesSpec, start: datetime, end: datetime) -> list[Point]:
+    if spec.rollup is not None and end - start > timedelta(days=ROLLUP_AFTER_DAYS):
+        query = (
+            select(_epoch_millis(_ROLLUP.bucket_start), spec.rollup)
+            .where(
+                _ROLLUP.resolution == models.RollupResolution.HOUR,
+                _ROLLUP.bucket_start >= start,
+                _ROLLUP.bucket_start < end,
+                spec.rollup.is_not(None),
+            )
+            .order_by(_ROLLUP.bucket_start)
+        )
+    else:
+        query = (
+            select(_epoch_millis(spec.tstamp), spec.value)
+            # Garmin marks periods without a measurement with negative values.
+            .where(spec.tstamp >= start, spec.tstamp < end, spec.value >= 0)
+            .order_by(spec.tstamp)
+        )
+    with Session(db.get_engine()) as session:
+        return [tuple(row) for row in session.execute(query)]
+
+
+def get_garmin_series(
+    names: Sequence[str],
+    start: datetime,
+    end: datetime,
+    *,
+    point_budget: int = DEFAULT_POINT_BUDGET,
+) -> list[GarminSeries]:
+    """Garmin series between start and end, each downsampled to the point budget.
+
+    Points are ``(epoch millis, value)`` pairs as Highcharts expects them.
+    Ranges longer than ``ROLLUP_AFTER_DAYS`` read hourly averages from
+    ``garmin_rollup`` for the series that have them.
+    """
+    unknown = set(names) - set(GARMIN_SERIES)
+    if unknown:
+        msg = f"Unknown Garmin series: {', '.join(sorted(unknown))}"
+        raise ValueError(msg)
+    point_budget = max(3, min(point_budget, MAX_POINT_BUDGET))
+
+    series = []
+    for name in names:
+        spec = GARMIN_SERIES[name]
+        points = _get_points(spec, start, end)
+        series.append(
+            GarminSeries(
+                name=name,
+                label=spec.label,
+                unit=spec.unit,
+                points=lttb(points, point_budget),
+                raw_point_count=len(points),
+            )
+        )
+        logger.debug(
+            "Garmin series %s: %d points downsampled to %d.",
+            name,
+            len(points),
+            len(series[-1].points),
+        )
+    return series
@@ -3,9 +3,10 @@ from datetime import date, datetime
 
 import requests
 from babel.dates import format_date
-from cachetools import TTLCache, cached
 from pydantic import BaseModel
 
+from family_intranet.repositories.cache import cached
+
 logger = logging.getLogger(__name__)
 
 MATTIS_YEAR_STARTED = 2023
@@ -34,7 +35,7 @@ class Vertretungsplan(BaseModel):
     events_present: bool
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=300, hard_ttl=21_600)  # 5 minutes, stale up to 6 hours
 def get_vertretungsplan_dates() -> tuple[date, ...]:
     url = "https://assets.gymnasium-broich.de/vplan/api/dates"
     data = requests.get(url, timeout=10).json()
@@ -51,7 +52,7 @@ def _replace_empty_str_with_none(v: str) -> str | None:
     return v
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=300, hard_ttl=21_600)  # 5 minutes, stale up to 6 hours
 def get_vertretungsplan(vertretungsplan_date: date) -> Vertretungsplan:
     base_url = "https://assets.gymnasium-broich.de/vplan/api/"
     data: dict = requests.get(base_url + vertretungsplan_date.isoformat()).json()
@@ -5,6 +5,8 @@ import requests
 from babel.dates import format_date
 from bs4 import BeautifulSoup
 
+from family_intranet.repositories.cache import cached
+
 TEAM_PORTRAIT_BASE_URL = (
     "https://hnr-handball.liga.nu/cgi-bin/WebObjects/nuLigaHBDE.woa/wa/teamPortrait"
 )
@@ -114,6 +116,7 @@ def get_erste_herren_gruppe_url() -> str:
     return f"{GRUPPE_BASE_URL}?{GRUPPE_ERSTE_HERREN}"
 
 
+@cached(ttl=1_800, hard_ttl=86_400)  # 30 minutes, stale up to 1 day
 def get_djk_saarn_d_jugend() -> list[HandballGame]:
     r = requests.get(
         TEAM_PORTRAIT_BASE_URL,
@@ -124,6 +127,7 @@ def get_djk_saarn_d_jugend() -> list[HandballGame]:
     return _parse_games(r.text)
 
 
+@cached(ttl=1_800, hard_ttl=86_400)  # 30 minutes, stale up to 1 day
 def get_djk_saarn_erste_herren() -> list[HandballGame]:
     r = requests.get(
         TEAM_PORTRAIT_BASE_URL,
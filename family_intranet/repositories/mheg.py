@@ -5,10 +5,11 @@ from datetime import date, timedelta
 import requests
 from babel.dates import format_date
 from bs4 import BeautifulSoup
-from cachetools import TTLCache, cached
 from dateutil.relativedelta import relativedelta
 from pydantic import BaseModel
 
+from family_intranet.repositories.cache import cached
+
 BASE_URL = "https://muelheim-abfallapp.regioit.de/abfall-app-muelheim/rest/"
 WERTSTOFFHOF_URL = "https://www.mheg.de/fuer-privathaushalte/entsorgung/wertstoffhof/"
 
@@ -52,7 +53,7 @@ class MuellTermine(BaseModel):
         return format_date(self.datum, format="EEE, d.M.yyyy", locale="de_DE")
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=3_600, hard_ttl=86_400)  # 1 hour, stale up to 1 day
 def _get_orte() -> list[dict]:
     """
     Request url: https://muelheim-abfallapp.regioit.de/abfall-app-muelheim/rest/orte
@@ -72,7 +73,7 @@ def _get_muelheim_id() -> int:
     return muelheim_id
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=3_600, hard_ttl=86_400)  # 1 hour, stale up to 1 day
 def _get_strassen(muelheim_id: int) -> list[dict]:
     """
     Example request url: "https://muelheim-abfallapp.regioit.de/abfall-app-muelheim/rest/orte/4546575/strassen"
@@ -126,7 +127,7 @@ def _get_friedhofstrassen_id() -> int:
     return friedhofstrassen_id
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=3_600, hard_ttl=86_400)  # 1 hour, stale up to 1 day
 def _get_hausnummern(strassen_id: int) -> list[dict]:
     """
     Example request url: "https://muelheim-abfallapp.regioit.de/abfall-app-muelheim/rest/strassen/4555127"
@@ -185,7 +186,7 @@ def _get_friedhofstrassen_62_id() -> int:
     return friedhofstrassen_62_id
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=60))  # 1 minute
+@cached(ttl=3_600, hard_ttl=86_400)  # 1 hour, stale up to 1 day
 def _get_termine(hausnummer_id: int) -> list[dict]:
     """
     Example request url: "https://muelheim-abfallapp.regioit.de/abfall-app-muelheim/rest/hausnummern/4112605/termine"
@@ -268,7 +269,7 @@ class WertstoffhofOeffnungszeiten(BaseModel):
     saturday_dates_2026: list[str]
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=900))  # 15 minutes
+@cached(ttl=3_600, hard_ttl=604_800)  # 1 hour, stale up to 1 week
 def get_wertstoffhof_oeffnungszeiten() -> WertstoffhofOeffnungszeiten:
     """Scrape Wertstoffhof opening hours from MHEG website."""
     response = requests.get(WERTSTOFFHOF_URL, timeout=10)
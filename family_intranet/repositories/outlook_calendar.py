@@ -8,6 +8,8 @@ import requests
 from icalendar import Calendar
 from pydantic import BaseModel
 
+from family_intranet.repositories.cache import cached
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,6 +30,7 @@ class WorkAppointment(BaseModel):
     is_tentative: bool
 
 
+@cached(ttl=600, hard_ttl=86_400)  # 10 minutes, stale up to 1 day
 def fetch_work_calendar(ics_url: str, days_ahead: int = 7) -> list[WorkAppointment]:
     """
     Fetch work appointments from Outlook ICS calendar.
@@ -12,9 +12,9 @@ from dataclasses import dataclass
 from logging import getLogger
 
 import requests
-from cachetools import TTLCache, cached
 
 from family_intranet import settings
+from family_intranet.repositories.cache import cached
 from family_intranet.repositories.owm_models import OWMOneCall
 
 log = getLogger(__name__)
@@ -75,17 +75,20 @@ def _query_owm(url: str, city: City, api_key: str, units: str) -> dict:
     )
 
 
-@cached(cache=TTLCache(maxsize=1, ttl=120))  # 2 minutes
-def get_weather_data_muelheim() -> tuple[OWMOneCall | None, str | None]:
+@cached(ttl=600, hard_ttl=10_800)  # 10 minutes, stale up to 3 hours
+def _get_one_call_muelheim() -> OWMOneCall:
     owm_config = OWMConfig(
         url_weather="https://api.openweathermap.org/data/2.5/weather",
         url_onecall="https://api.openweathermap.org/data/3.0/onecall",
         units="metric",
         api_key=settings.OPENWEATHERMAP_API_KEY or "",
     )
+    return query_one_call_api(MUELHEIM, owm_config)
+
 
+def get_weather_data_muelheim() -> tuple[OWMOneCall | None, str | None]:
     try:
-        data = query_one_call_api(MUELHEIM, owm_config)
+        data = _get_one_call_muelheim()
     except Exception as e:
         return None, str(e)
 
@@ -92,6 +92,18 @@ DATABASES = {
     }
 }
 
+# Repository results are cached across processes (web and worker) in the
+# database by default; run `manage.py createcachetable` once.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "repository": {
+        "BACKEND": os.environ.get(
+            "REPOSITORY_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"
+        ),
+        "LOCATION": os.environ.get("REPOSITORY_CACHE_LOCATION", "repository_cache"),
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -136,7 +148,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 TASKS = {
     "default": {
         "BACKEND": "django_tasks_db.DatabaseBackend",
-        "QUEUES": ["default"],
+        "QUEUES": ["default", "garmin_backfill"],
     }
 }
 
@@ -153,6 +165,8 @@ PUSHOVER_USER_KEY = os.environ.get("PUSHOVER_USER_KEY")
 GARMIN_EMAIL = os.environ.get("GARMIN_EMAIL")
 GARMIN_PASSWORD = os.environ.get("GARMIN_PASSWORD")
 GARMIN_AUTH_TOKEN_PATH = os.environ.get("GARMIN_AUTH_TOKEN_PATH", "~/.garth")
+# Seconds before expiry at which the Garmin OAuth2 token is refreshed
+GARMIN_TOKEN_REFRESH_MARGIN = int(os.environ.get("GARMIN_TOKEN_REFRESH_MARGIN", "600"))
 
 # Garmin datastore DB (SQLAlchemy connection — falls back to Django POSTGRES_* vars)
 GARMIN_DB_HOST = os.environ.get("GARMIN_DB_HOST")
@@ -161,6 +175,33 @@ GARMIN_DB_USER = os.environ.get("GARMIN_DB_USER")
 GARMIN_DB_PASSWORD = os.environ.get("GARMIN_DB_PASSWORD")
 GARMIN_DB_NAME = os.environ.get("GARMIN_DB_NAME")
 GARMIN_DB_SCHEMA = os.environ.get("GARMIN_DB_SCHEMA", "data")
+GARMIN_DB_POOL_SIZE = int(os.environ.get("GARMIN_DB_POOL_SIZE", "5"))
+GARMIN_DB_MAX_OVERFLOW = int(os.environ.get("GARMIN_DB_MAX_OVERFLOW", "5"))
+# Seconds after which pooled connections are replaced
+GARMIN_DB_POOL_RECYCLE = int(os.environ.get("GARMIN_DB_POOL_RECYCLE", "1800"))
+GARMIN_DB_POOL_PRE_PING = (
+    os.environ.get("GARMIN_DB_POOL_PRE_PING", "true").lower() == "true"
+)
+
+# Garmin load concurrency: days fetched in parallel and API calls per second
+GARMIN_LOAD_MAX_WORKERS = int(os.environ.get("GARMIN_LOAD_MAX_WORKERS", "4"))
+GARMIN_API_RATE_LIMIT = float(os.environ.get("GARMIN_API_RATE_LIMIT", "2"))
+GARMIN_API_BURST = int(os.environ.get("GARMIN_API_BURST", "5"))
+# The limits above hold per process; they are divided by the number of worker
+# processes that call the Garmin API at the same time (e.g. backfill workers)
+GARMIN_API_PROCESSES = int(os.environ.get("GARMIN_API_PROCESSES", "1"))
+# Retries of throttled (429), 5xx and connection-failed API calls, with
+# exponential backoff in seconds (Retry-After is honoured up to the max delay)
+GARMIN_API_MAX_RETRIES = int(os.environ.get("GARMIN_API_MAX_RETRIES", "5"))
+GARMIN_API_RETRY_BASE_DELAY = float(os.environ.get("GARMIN_API_RETRY_BASE_DELAY", "1"))
+GARMIN_API_RETRY_MAX_DELAY = float(os.environ.get("GARMIN_API_RETRY_MAX_DELAY", "60"))
+# Only write today's heart rate, stress, steps and body battery points newer than
+# the latest stored ones
+GARMIN_DELTA_LOAD = os.environ.get("GARMIN_DELTA_LOAD", "true").lower() == "true"
+
+# Raw Garmin API responses are archived here (one gzip file per day and endpoint).
+# Set to an empty string to disable archiving.
+GARMIN_ARCHIVE_PATH = os.environ.get("GARMIN_ARCHIVE_PATH", "~/.garmin_archive")
 
 # HTMX timeout in milliseconds (default: 30 seconds)
 HTMX_TIMEOUT = int(os.environ.get("HTMX_TIMEOUT", "10000"))